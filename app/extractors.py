@@ -0,0 +1,313 @@
+import xml.etree.ElementTree as ET
+
+from utils import strip_namespace
+
+HITS_STAT_ID = "31"
+
+
+class MatchupTeam:
+    __slots__ = ("team_key", "name", "logo_url", "points")
+
+    def __init__(self):
+        self.team_key = None
+        self.name = None
+        self.logo_url = None
+        self.points = 0.0
+
+
+class Matchup:
+    __slots__ = (
+        "week",
+        "week_start",
+        "week_end",
+        "is_tied",
+        "is_playoffs",
+        "is_consolation",
+        "winner_team_key",
+        "teams",
+    )
+
+    def __init__(self):
+        self.week = None
+        self.week_start = None
+        self.week_end = None
+        self.is_tied = 0
+        self.is_playoffs = 0
+        self.is_consolation = 0
+        self.winner_team_key = None
+        self.teams = []  # [MatchupTeam]
+
+
+class PlayerStats:
+    __slots__ = (
+        "player_key",
+        "team_key",
+        "name",
+        "image_url",
+        "primary_position",
+        "display_position",
+        "points",
+        "hits",
+    )
+
+    def __init__(self, team_key=None):
+        self.player_key = None
+        self.team_key = team_key  # Only set for rosters
+        self.name = None
+        self.image_url = None
+        self.primary_position = None
+        self.display_position = None
+        self.points = 0.0
+        self.hits = 0
+
+
+class DailyPoints:
+    __slots__ = ("key", "name", "image_url", "points_by_date")
+
+    def __init__(self):
+        self.key = None  # team_key or player_key
+        self.name = None
+        self.image_url = None
+        self.points_by_date = {}  # {[date: str]: float}
+
+
+class TransactionPlayer:
+    __slots__ = (
+        "player_key",
+        "name",
+        "type",
+        "source_team_key",
+        "destination_team_key",
+    )
+
+    def __init__(self):
+        self.player_key = None
+        self.name = None
+        self.type = None
+        self.source_team_key = None
+        self.destination_team_key = None
+
+
+class Transaction:
+    __slots__ = ("type", "status", "timestamp", "players")
+
+    def __init__(self):
+        self.type = None
+        self.status = None
+        self.timestamp = 0
+        self.players = []  # [TransactionPlayer]
+
+
+class DraftPick:
+    __slots__ = ("pick", "round", "team_key", "player_key")
+
+    def __init__(self):
+        self.pick = None
+        self.round = None
+        self.team_key = None
+        self.player_key = None
+
+
+class StreamExtractor:
+    """
+    Base for decoders that pull only the fields a metric needs out of a Yahoo XML stream into compact records,
+    skipping the generic dict construction of XmlDecoder. Has the same feed()/close() interface as XmlDecoder.
+    Subclasses implement start(path) and end(path, text), path being the namespace stripped tags from the root
+    down to the current element.
+    """
+
+    def __init__(self):
+        self.parser = ET.XMLPullParser(events=("start", "end"))
+        self.path = []
+        self.records = []
+
+    def feed(self, chunk):
+        self.parser.feed(chunk)
+        self.read_events()
+
+    def close(self):
+        self.parser.close()
+        self.read_events()
+        return self.records
+
+    def read_events(self):
+        path = self.path
+        for event, element in self.parser.read_events():
+            if event == "start":
+                path.append(strip_namespace(element.tag))
+                if len(path) > 2:
+                    self.start(path)
+            else:
+                if len(path) > 2:
+                    self.end(path, element.text.strip() if element.text else "")
+                path.pop()
+                element.clear()
+
+    def start(self, path):
+        pass
+
+    def end(self, path, text):
+        pass
+
+
+class ScoreboardExtractor(StreamExtractor):
+    """
+    /league/{league_key}/scoreboard -> [Matchup]
+    """
+
+    MATCHUP_FIELDS = {
+        "week": int,
+        "week_start": str,
+        "week_end": str,
+        "is_tied": int,
+        "is_playoffs": int,
+        "is_consolation": int,
+        "winner_team_key": str,
+    }
+
+    def start(self, path):
+        tag = path[-1]
+        if tag == "matchup":
+            self.matchup = Matchup()
+            self.records.append(self.matchup)
+        elif tag == "team" and path[-3] == "matchup":
+            self.team = MatchupTeam()
+            self.matchup.teams.append(self.team)
+
+    def end(self, path, text):
+        tag, parent = path[-1], path[-2]
+        if parent == "matchup":
+            if tag in self.MATCHUP_FIELDS:
+                setattr(self.matchup, tag, self.MATCHUP_FIELDS[tag](text))
+        elif parent == "team":
+            if tag == "team_key":
+                self.team.team_key = text
+            elif tag == "name":
+                self.team.name = text
+        elif parent == "team_points" and tag == "total":
+            self.team.points = float(text or 0)
+        elif parent == "team_logo" and tag == "url":
+            self.team.logo_url = text
+
+
+class PlayerStatsExtractor(StreamExtractor):
+    """
+    /team/{team_key}/roster/players/stats, /league/{league_key}/teams/roster/players/stats and
+    /league/{league_key}/players/stats -> [PlayerStats]
+    """
+
+    PLAYER_FIELDS = {"player_key", "image_url", "primary_position", "display_position"}
+
+    def __init__(self):
+        super().__init__()
+        self.team_key = None
+        self.stat_id = None
+
+    def start(self, path):
+        if path[-1] == "player":
+            self.player = PlayerStats(self.team_key)
+            self.records.append(self.player)
+
+    def end(self, path, text):
+        tag, parent = path[-1], path[-2]
+        if parent == "player":
+            if tag in self.PLAYER_FIELDS:
+                setattr(self.player, tag, text)
+        elif parent == "name" and tag == "full":
+            self.player.name = text
+        elif parent == "player_points" and tag == "total":
+            self.player.points = float(text or 0)
+        elif parent == "stat":
+            if tag == "stat_id":
+                self.stat_id = text
+            elif (
+                tag == "value"
+                and self.stat_id == HITS_STAT_ID
+                and text not in ("", "-")
+            ):
+                self.player.hits = int(text)
+        elif parent == "team" and tag == "team_key":
+            self.team_key = text
+
+
+class DailyPointsExtractor(StreamExtractor):
+    """
+    /league/{league_key}/teams/stats_collection;types=date and /league/{league_key}/players/stats_collection;types=date
+    -> [DailyPoints]
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.date = None
+
+    def start(self, path):
+        if path[-1] in ("team", "player"):
+            self.owner = DailyPoints()
+            self.records.append(self.owner)
+
+    def end(self, path, text):
+        tag, parent = path[-1], path[-2]
+        if parent in ("team_points", "player_points"):
+            if tag == "date":
+                self.date = text
+            elif tag == "total":
+                self.owner.points_by_date[self.date] = float(text or 0)
+        elif parent in ("team", "player"):
+            if tag in ("team_key", "player_key"):
+                self.owner.key = text
+            elif tag == "image_url":
+                self.owner.image_url = text
+            elif tag == "name" and parent == "team":
+                self.owner.name = text
+        elif parent == "name" and tag == "full":
+            self.owner.name = text
+
+
+class TransactionsExtractor(StreamExtractor):
+    """
+    /league/{league_key}/transactions -> [Transaction]
+    """
+
+    PLAYER_FIELDS = {"type", "source_team_key", "destination_team_key"}
+
+    def start(self, path):
+        tag = path[-1]
+        if tag == "transaction":
+            self.transaction = Transaction()
+            self.records.append(self.transaction)
+        elif tag == "player":
+            self.player = TransactionPlayer()
+            self.transaction.players.append(self.player)
+
+    def end(self, path, text):
+        tag, parent = path[-1], path[-2]
+        if parent == "transaction":
+            if tag in ("type", "status"):
+                setattr(self.transaction, tag, text)
+            elif tag == "timestamp":
+                self.transaction.timestamp = int(text)
+        elif parent == "transaction_data":
+            if tag in self.PLAYER_FIELDS:
+                setattr(self.player, tag, text)
+        elif parent == "player" and tag == "player_key":
+            self.player.player_key = text
+        elif parent == "name" and tag == "full":
+            self.player.name = text
+
+
+class DraftResultsExtractor(StreamExtractor):
+    """
+    /league/{league_key}/draftresults -> [DraftPick]
+    """
+
+    DRAFT_PICK_FIELDS = {"pick": int, "round": int, "team_key": str, "player_key": str}
+
+    def start(self, path):
+        if path[-1] == "draft_result":
+            self.draft_pick = DraftPick()
+            self.records.append(self.draft_pick)
+
+    def end(self, path, text):
+        tag = path[-1]
+        if path[-2] == "draft_result" and tag in self.DRAFT_PICK_FIELDS:
+            setattr(self.draft_pick, tag, self.DRAFT_PICK_FIELDS[tag](text))
@@ -1,6 +1,6 @@
 import os
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore_async
 from dotenv import load_dotenv
 import json
 
@@ -9,6 +9,11 @@ GOOGLE_APPLICATION_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 
 
 def initialize_firebase():
+    """
+    Initializes the Firebase app, meant to be called once at startup and the client shared between requests
+    Returns:
+        google.cloud.firestore.AsyncClient
+    """
     # Initialize Firebase app (Only do this once)
     if not firebase_admin._apps:
         google_application_credentials_json = json.loads(GOOGLE_APPLICATION_CREDENTIALS)
@@ -17,12 +22,12 @@ def initialize_firebase():
         )
         cred = credentials.Certificate(google_application_credentials_json)
         firebase_admin.initialize_app(cred)
-    return firestore.client()
+    return firestore_async.client()
 
 
-def get_document(db, collection, document_id):
+async def get_document(db, collection, document_id):
     doc_ref = db.collection(collection).document(document_id)
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
     if doc.exists:
         return doc.to_dict()
     return None
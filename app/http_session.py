@@ -0,0 +1,40 @@
+import asyncio
+import aiohttp
+
+CONNECTION_LIMIT = 100  # Open connections across all hosts
+# Covers MAX_CONCURRENT_REQUESTS for a few concurrent wrapped builds
+CONNECTION_LIMIT_PER_HOST = 30
+KEEPALIVE_TIMEOUT = 60  # Seconds an idle connection is kept warm
+DNS_CACHE_TTL = 300  # Seconds
+TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+
+session = None  # Process wide aiohttp.ClientSession
+session_loop = None  # Sessions can't be used outside the loop that created them
+
+
+def get_session():
+    """
+    Returns the process wide session, creating it on first use. Every Query borrows it so concurrent and consecutive
+    wrapped builds reuse warm keep-alive connections instead of paying a TCP+TLS handshake per request.
+    Returns:
+        aiohttp.ClientSession
+    """
+    global session, session_loop
+    loop = asyncio.get_running_loop()
+    if session is None or session.closed or session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+        )
+        session = aiohttp.ClientSession(connector=connector, timeout=TIMEOUT)
+        session_loop = loop
+    return session
+
+
+async def close_session():
+    global session
+    if session is not None and not session.closed:
+        await session.close()
+    session = None
@@ -0,0 +1,201 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import bisect
+import contextvars
+import json
+import time
+
+# Upper bounds (seconds) of the Yahoo latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    Yahoo usage and timings of one metric run. Requests are attributed to the span that was current when they were
+    issued, which asyncio carries into every task the metric creates. A response shared through Query.response_cache
+    counts as a request for the metric that fetched it and as a cache hit for the others.
+    """
+
+    __slots__ = (
+        "name",
+        "league_key",
+        "phase",
+        "requests",
+        "cache_hits",
+        "retries",
+        "bytes_received",
+        "parse_seconds",
+        "latency_counts",
+        "latency_seconds",
+        "wait_seconds",
+        "in_flight",
+        "wait_start",
+        "start",
+        "seconds",
+        "failed",
+    )
+
+    def __init__(self, name, league_key, phase="metric"):
+        self.name = name
+        self.league_key = league_key
+        # "metric" for metric runs, anything else is request plumbing around them
+        self.phase = phase
+        self.requests = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.bytes_received = 0
+        self.parse_seconds = 0.0
+        self.latency_counts = [0] * len(LATENCY_BUCKETS)
+        self.latency_seconds = 0.0
+        # Wall time with at least one of this span's requests in flight
+        self.wait_seconds = 0.0
+        self.in_flight = 0
+        self.wait_start = None
+        self.start = time.perf_counter()
+        self.seconds = None
+        self.failed = False
+
+    @property
+    def compute_seconds(self):
+        """
+        Returns:
+            float: wall time not spent waiting on Yahoo, includes time other metrics held the event loop
+        """
+        return max(self.seconds - self.wait_seconds, 0.0)
+
+    def request_started(self):
+        if self.in_flight == 0:
+            self.wait_start = time.perf_counter()
+        self.in_flight += 1
+
+    def request_finished(self, latency, num_bytes, parse_seconds):
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self.wait_seconds += time.perf_counter() - self.wait_start
+        self.requests += 1
+        self.bytes_received += num_bytes
+        self.parse_seconds += parse_seconds
+        self.latency_counts[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.latency_seconds += latency
+
+    def to_dict(self):
+        return {
+            "event": "metric_span",
+            "metric": self.name,
+            "phase": self.phase,
+            "league_key": self.league_key,
+            "failed": self.failed,
+            "seconds": round(self.seconds, 4),
+            "compute_seconds": round(self.compute_seconds, 4),
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "retries": self.retries,
+            "bytes_received": self.bytes_received,
+            "parse_seconds": round(self.parse_seconds, 4),
+            "latency_seconds": round(self.latency_seconds, 4),
+            "latency_buckets": dict(
+                zip(map(str, LATENCY_BUCKETS), self.latency_counts)
+            ),
+        }
+
+
+class MetricsRegistry:
+    """
+    Process wide totals of finished spans by phase and metric name, rendered in the Prometheus text format
+    """
+
+    COUNTERS = (
+        # (name, help, Span attribute)
+        ("wrapped_metric_runs_total", "Metric runs", None),
+        ("wrapped_metric_failures_total", "Metric runs that raised", "failed"),
+        ("wrapped_metric_seconds_total", "Metric wall time", "seconds"),
+        (
+            "wrapped_metric_compute_seconds_total",
+            "Metric wall time not waiting on Yahoo",
+            "compute_seconds",
+        ),
+        ("wrapped_yahoo_requests_total", "Yahoo requests issued", "requests"),
+        (
+            "wrapped_yahoo_cache_hits_total",
+            "Yahoo responses served from the per-Query cache",
+            "cache_hits",
+        ),
+        ("wrapped_yahoo_retries_total", "Yahoo requests retried", "retries"),
+        (
+            "wrapped_yahoo_response_bytes_total",
+            "Yahoo response bytes received",
+            "bytes_received",
+        ),
+        (
+            "wrapped_yahoo_parse_seconds_total",
+            "Time spent decoding Yahoo responses",
+            "parse_seconds",
+        ),
+    )
+
+    def __init__(self):
+        # {[name]: {[(phase, metric)]}}
+        self.counters = defaultdict(lambda: defaultdict(float))
+        self.latency_counts = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        self.latency_seconds = defaultdict(float)
+
+    def record(self, span):
+        key = (span.phase, span.name)
+        for name, _, attribute in self.COUNTERS:
+            self.counters[name][key] += (
+                1 if attribute is None else float(getattr(span, attribute))
+            )
+        counts = self.latency_counts[key]
+        for i, count in enumerate(span.latency_counts):
+            counts[i] += count
+        self.latency_seconds[key] += span.latency_seconds
+
+    def render(self):
+        """
+        Returns:
+            str: Prometheus text exposition format
+        """
+        lines = []
+        for name, help_text, _ in self.COUNTERS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (phase, metric), value in sorted(self.counters[name].items()):
+                lines.append(f'{name}{{phase="{phase}",metric="{metric}"}} {value:g}')
+        name = "wrapped_yahoo_request_duration_seconds"
+        lines.append(f"# HELP {name} Yahoo request latency")
+        lines.append(f"# TYPE {name} histogram")
+        for key, counts in sorted(self.latency_counts.items()):
+            labels = 'phase="{}",metric="{}"'.format(*key)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {self.latency_seconds[key]:g}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+@contextmanager
+def metric_span(name, league_key, phase="metric"):
+    """
+    Makes a new Span current for the enclosed code (and the tasks it creates), then logs it as a JSON line and adds it
+    to REGISTRY. Spans that aren't a metric run pass their own phase so /metrics keeps them apart from the metrics
+    """
+    span = Span(name, league_key, phase)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException:
+        span.failed = True
+        raise
+    finally:
+        current_span.reset(token)
+        span.seconds = time.perf_counter() - span.start
+        REGISTRY.record(span)
+        print(json.dumps(span.to_dict()))
@@ -0,0 +1,322 @@
+import asyncio
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+# Wrapped builds a process runs at once, the rest wait in the queue
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+JOBS_DB = os.getenv("JOBS_DB", "jobs.sqlite3")  # Durable copy of the queue
+# Seconds finished jobs stay queryable and unfinished ones can still be resumed
+JOB_RETENTION = 7 * 24 * 3600
+# What happens to a job when the last client following it disconnects: "detach" keeps computing so every metric ends
+# up cached in Firestore for the next visit, "cancel" stops it and aborts its outstanding Yahoo requests
+DISCONNECT_POLICIES = ("detach", "cancel")
+DISCONNECT_POLICY = os.getenv("DISCONNECT_POLICY", "detach")
+
+
+class Job:
+    """
+    One wrapped build shared by every request for the same league. Every event is kept for the lifetime of the job so
+    a request that joins late is replayed what was already emitted before following along live.
+    """
+
+    def __init__(self, id, key, token, created_at=None, cancel_on_disconnect=False):
+        self.id = id
+        self.key = key  # league_key
+        # {"access_token", "refresh_token"} only kept in memory, None for a job resumed after a restart until a client
+        # opens its league again
+        self.token = token
+        self.cancel_on_disconnect = cancel_on_disconnect
+        self.status = "queued"  # queued, running, done, failed or cancelled
+        # Metrics done out of the league's total, kept up to date by the job's events
+        self.progress = {"completed": 0, "total": None}
+        self.created_at = created_at or time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []  # [str] everything emitted so far
+        self.error = None
+        self.done = False
+        self.task = None  # Set by the worker running the job
+        self.subscribers = 0
+        # Replaced after every notify so waiters only wake up for newer events
+        self.updated = asyncio.Event()
+
+    def start(self):
+        self.status = "running"
+        self.started_at = time.time()
+
+    async def run(self, events):
+        try:
+            async for event in events:
+                self.events.append(event)
+                self.notify()
+            self.status = "done"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+        except Exception as e:
+            print(f"Job {self.id} for {self.key} failed: {e!r}")
+            self.status = "failed"
+            self.error = e
+        finally:
+            self.finished_at = time.time()
+            self.done = True
+            self.notify()
+
+    def cancel(self):
+        print(f"Cancelling job {self.id} for {self.key}")
+        if self.task:
+            self.task.cancel()
+            return
+        # Still queued, the worker that picks it up skips it
+        self.status = "cancelled"
+        self.finished_at = time.time()
+        self.done = True
+        self.notify()
+
+    def notify(self):
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+    async def subscribe(self, pace=0.0):
+        """
+        Yields every event emitted so far, then each new event as it's emitted until the job is done.
+        Events that were already waiting are spaced out by pace seconds, 0 yields them back to back.
+        Raises the job's exception after its events have been replayed.
+        """
+        i = 0
+        self.subscribers += 1
+        try:
+            while True:
+                updated = self.updated
+                first = True
+                while i < len(self.events):
+                    if not first and pace:
+                        await asyncio.sleep(pace)
+                    yield self.events[i]
+                    i += 1
+                    first = False
+                if self.done:
+                    if self.error:
+                        raise self.error
+                    return
+                await updated.wait()
+        finally:
+            # Runs when the subscriber is closed or cancelled, e.g. its client disconnected
+            self.subscribers -= 1
+            if not self.subscribers and not self.done and self.cancel_on_disconnect:
+                self.cancel()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "league_key": self.key,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "error": repr(self.error) if self.error else None,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobStore:
+    """
+    sqlite copy of every job so queued and running jobs are picked up again after a restart and finished jobs can
+    still be looked up. Yahoo tokens are never written, an interrupted job resumes once a client opens its league again.
+    """
+
+    COLUMNS = (
+        "id",
+        "league_key",
+        "status",
+        "completed",
+        "total",
+        "error",
+        "created_at",
+        "started_at",
+        "finished_at",
+    )
+
+    def __init__(self, path=JOBS_DB):
+        # Used from worker threads through asyncio.to_thread, the lock serializes them
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            columns = [
+                row[1] for row in self.connection.execute("PRAGMA table_info(jobs)")
+            ]
+            if "access_token" in columns:
+                # Written by a version that persisted Yahoo tokens, don't keep them around
+                self.connection.execute("DROP TABLE jobs")
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS jobs ({', '.join(self.COLUMNS)}, PRIMARY KEY (id))"
+            )
+            self.connection.execute(
+                "DELETE FROM jobs WHERE COALESCE(finished_at, created_at) < ?",
+                (time.time() - JOB_RETENTION,),
+            )
+
+    def save(self, job):
+        row = (
+            job.id,
+            job.key,
+            job.status,
+            job.progress["completed"],
+            job.progress["total"],
+            repr(job.error) if job.error else None,
+            job.created_at,
+            job.started_at,
+            job.finished_at,
+        )
+        with self.lock, self.connection:
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO jobs VALUES ({', '.join('?' * len(row))})",
+                row,
+            )
+
+    def load(self, job_id):
+        """
+        Returns:
+            dict like Job.to_dict or None
+        """
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        row = dict(zip(self.COLUMNS, row))
+        return {
+            "id": row["id"],
+            "league_key": row["league_key"],
+            "status": row["status"],
+            "progress": {"completed": row["completed"], "total": row["total"]},
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def load_unfinished(self):
+        """
+        Returns:
+            [Job] jobs that were queued or running when the process stopped, oldest first, without a token
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, league_key, created_at FROM jobs "
+                "WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [
+            Job(job_id, league_key, None, created_at)
+            for job_id, league_key, created_at in rows
+        ]
+
+    def close(self):
+        self.connection.close()
+
+
+class JobRegistry:
+    """
+    Queue of wrapped builds run by a fixed pool of workers so heavy builds are capped per process and don't run on
+    the request path. Submitting is single-flight per league, requests for a league that's already queued or running
+    get the existing job.
+    """
+
+    def __init__(self, disconnect_policy=DISCONNECT_POLICY):
+        if disconnect_policy not in DISCONNECT_POLICIES:
+            raise ValueError(f"disconnect_policy must be one of {DISCONNECT_POLICIES}")
+        self.disconnect_policy = disconnect_policy
+        self.jobs = {}  # {[job_id: str]: Job} unfinished jobs
+        self.jobs_by_key = {}  # {[league_key: str]: Job} unfinished job of each league
+        self.queue = None
+        self.workers = []
+        self.store = None
+        self.run_job = None
+
+    async def start(self, run_job, store, num_workers=MAX_CONCURRENT_JOBS):
+        """
+        run_job(job) returns the async iterable of the job's events
+        """
+        self.run_job = run_job
+        self.store = store
+        self.queue = asyncio.Queue()
+        for job in await asyncio.to_thread(store.load_unfinished):
+            # Tokens aren't persisted, submit queues the job again with the token of the next request for its league
+            print(f"Job {job.id} for {job.key} waits for its league to be opened again")
+            self.jobs[job.id] = job
+            self.jobs_by_key[job.key] = job
+        self.workers = [asyncio.create_task(self.work()) for _ in range(num_workers)]
+
+    async def stop(self):
+        # Interrupted jobs stay queued or running in the store and are resumed by the next start
+        tasks = self.workers + [job.task for job in self.jobs.values() if job.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers = []
+        self.jobs.clear()
+        self.jobs_by_key.clear()
+        self.store.close()
+
+    def enqueue(self, job):
+        self.jobs[job.id] = job
+        self.jobs_by_key[job.key] = job
+        self.queue.put_nowait(job)
+
+    async def submit(self, key, token, detach=False):
+        """
+        detach: keep computing whatever the disconnect policy, for jobs nobody is following
+        Returns:
+            Job: the unfinished job for key, or a new queued one
+        """
+        job = self.jobs_by_key.get(key)
+        if job is not None and job.token is None:
+            print(f"Resuming job {job.id} for {job.key}")
+            job.token = token
+            job.cancel_on_disconnect = self.disconnect_policy == "cancel"
+            self.queue.put_nowait(job)
+        elif job is None or job.done:
+            job = Job(
+                # Unguessable, knowing a job's id is what lets GET /jobs/{id} read it
+                secrets.token_urlsafe(16),
+                key,
+                token,
+                cancel_on_disconnect=self.disconnect_policy == "cancel",
+            )
+            self.enqueue(job)
+            await asyncio.to_thread(self.store.save, job)
+        if detach:
+            job.cancel_on_disconnect = False
+        return job
+
+    async def get(self, job_id):
+        """
+        Returns:
+            dict like Job.to_dict or None
+        """
+        job = self.jobs.get(job_id)
+        if job:
+            return job.to_dict()
+        return await asyncio.to_thread(self.store.load, job_id)
+
+    async def work(self):
+        while True:
+            job = await self.queue.get()
+            if not job.done:  # Not cancelled while it was queued
+                job.start()
+                # Saved as running so a job interrupted by a restart is resumed
+                await asyncio.to_thread(self.store.save, job)
+                job.task = asyncio.create_task(job.run(self.run_job(job)))
+                await asyncio.wait([job.task])
+            # Finished jobs are only kept in the store, later requests are served from Firestore
+            del self.jobs[job.id]
+            if self.jobs_by_key.get(job.key) is job:
+                del self.jobs_by_key[job.key]
+            await asyncio.to_thread(self.store.save, job)
+
+
+jobs = JobRegistry()
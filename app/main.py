@@ -1,45 +1,188 @@
 from typing import Annotated
-from fastapi import FastAPI, Header
-from fastapi.responses import StreamingResponse
-import json
+from contextlib import aclosing, asynccontextmanager
+from itertools import takewhile
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import asyncio
+import os
+import time
 
 from query import Query
+from metrics import METRICS
 from firebase import initialize_firebase
+from instrumentation import REGISTRY, metric_span
+from http_session import close_session
+from jobs import JobStore, jobs
 
-app = FastAPI()
 
+@asynccontextmanager
+async def lifespan(app):
+    # One Firestore client per process, creating it re-parses the credentials and opens a new channel
+    start = time.perf_counter()
+    app.state.db = initialize_firebase()
+    print(f"Firestore client initialized in {time.perf_counter() - start:.3f}s")
+    await jobs.start(run_wrapped, JobStore())
+    yield
+    await jobs.stop()
+    await close_session()
+    app.state.db.close()
 
-async def event_stream(resp):
-    await asyncio.sleep(1)
+
+app = FastAPI(lifespan=lifespan)
+
+# "paced" spaces out events so the UI can animate them in, "instant" flushes everything as soon as it's available
+STREAM_MODES = ("paced", "instant")
+STREAM_MODE = os.getenv("STREAM_MODE", "paced")
+CACHED_PACE = 1.0  # Seconds between cached metrics when paced
+LIVE_PACE = 0.1  # Seconds between results of the same metric when paced
+MAX_PACE = 5.0  # Upper bound on a client requested pace
+
+
+def get_paces(stream, pace):
+    """
+    Returns:
+        (cached_pace: float, live_pace: float) seconds to wait between events, 0 meaning no waiting
+    """
+    if pace is not None:  # Client requested pace applies to both cached and live events
+        pace = min(max(pace, 0.0), MAX_PACE)
+        return pace, pace
+    if (stream or STREAM_MODE) == "instant":
+        return 0.0, 0.0
+    return CACHED_PACE, LIVE_PACE
+
+
+def get_token(authorization, x_refresh_token):
+    """
+    Returns:
+        {"access_token", "refresh_token"} or None when there's no bearer token
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    return {
+        "access_token": authorization.split(" ")[1],
+        "refresh_token": x_refresh_token,
+    }
+
+
+async def run_wrapped(job):
+    """
+    Events of a wrapped job, run by the job workers: every metric in display order, the ones cached in Firestore
+    straight away and the missing ones as they're computed
+    """
+    doc_ref = app.state.db.collection("wrapped").document(job.key)
+    doc = await doc_ref.get()
+    cached_results = (doc.to_dict() if doc.exists else {}).get("results", {})
+    # Cached metrics up to the first missing one, the cached metrics after it are yielded in their place by get_metrics
+    sent = list(takewhile(cached_results.__contains__, METRICS))
+    cached_resp = [json_resp for name in sent for json_resp in cached_results[name]]
+    job.progress = {
+        "completed": sum(name in cached_results for name in METRICS),
+        "total": len(METRICS),
+    }
+    # Serve what's already cached right away while only the missing metrics are computed, one event per slide so
+    # Job.subscribe paces them like live events
+    for json_resp in cached_resp:
+        yield f"{json_resp}\n"
+    if job.progress["completed"] == job.progress["total"]:
+        return
+
+    def on_metric(name):
+        job.progress["completed"] += 1
+
+    query = await Query.create(job.key, job.token, doc_ref)
+    try:
+        async for metric in query.get_metrics(
+            {**cached_results, **dict.fromkeys(sent, [])}, pace=0, on_metric=on_metric
+        ):
+            yield f"{metric}\n"
+    finally:
+        # Aborts the outstanding Yahoo requests when the job is cancelled
+        await query.close()
+
+
+async def event_stream(resp, pace=CACHED_PACE):
+    if not pace:
+        # Whole payload in one write
+        yield "".join(f"{json_resp}\n" for json_resp in resp)
+        return
+    await asyncio.sleep(pace)
     for json_resp in resp:
         yield f"{json_resp}\n"  # StreamingResponse already prefixes data with "data: "
-        await asyncio.sleep(1)
+        await asyncio.sleep(pace)
 
 
 @app.get("/wrapped/{league_key}")
 async def get_fantasy_wrapped(
+    request: Request,
     league_key: str,
     authorization: Annotated[str | None, Header()] = None,
     x_refresh_token: Annotated[str | None, Header()] = None,
+    stream: str | None = None,
+    pace: float | None = None,
 ):
-    db = initialize_firebase()
-    doc_ref = db.collection("wrapped").document(league_key)
-    doc = doc_ref.get()
-    if doc.exists:
-        resp = doc.to_dict()["metrics"]
-        return StreamingResponse(event_stream(resp), media_type="text/event-stream")
-    print("Not in Firebase Firestore cache")
-    if not authorization or not authorization.startswith("Bearer "):
-        return json.dumps({"error": "Missing or invalid access token"}), 401
-    access_token = authorization.split(" ")[1]
-    token = {"access_token": access_token, "refresh_token": x_refresh_token}
+    if stream is not None and stream not in STREAM_MODES:
+        return JSONResponse({"error": f"stream must be one of {STREAM_MODES}"}, 400)
+    cached_pace, live_pace = get_paces(stream, pace)
+    doc_ref = request.app.state.db.collection("wrapped").document(league_key)
+    with metric_span("firestore_read", league_key, phase="cache"):
+        doc = await doc_ref.get()
+    doc_dict = doc.to_dict() if doc.exists else {}
+    if "metrics" in doc_dict:
+        # Complete wrapped cached before metrics were stored individually
+        resp = doc_dict["metrics"]
+        return StreamingResponse(
+            event_stream(resp, cached_pace), media_type="text/event-stream"
+        )
+    cached_results = doc_dict.get("results", {})  # {[metric: str]: [json: str]}
+    cached_resp = [
+        json_resp for name in METRICS for json_resp in cached_results.get(name, [])
+    ]
+    if all(name in cached_results for name in METRICS):
+        return StreamingResponse(
+            event_stream(cached_resp, cached_pace), media_type="text/event-stream"
+        )
+    print(f"Not in Firebase Firestore cache: {len(cached_results)}/{len(METRICS)}")
+    token = get_token(authorization, x_refresh_token)
+    if token is None:
+        return JSONResponse({"error": "Missing or invalid access token"}, 401)
+    # The build runs on the job workers, everyone opening the same league at once tails the same job and is replayed
+    # what was already emitted instead of querying Yahoo again
+    job = await jobs.submit(league_key, token)
 
-    # Send an initial response while Query is being initialized
+    # Send an initial response while the job is queued and Query is being initialized
     async def delayed_stream():
         yield "Test\n"
-        query = await Query.create(league_key, token, doc_ref)
-        async for metric in query.get_metrics():
-            yield f"{metric}\n"
+        # Closed as soon as the client disconnects so the job applies DISCONNECT_POLICY right away
+        async with aclosing(job.subscribe(live_pace)) as chunks:
+            async for chunk in chunks:
+                yield chunk
 
     return StreamingResponse(delayed_stream(), media_type="text/event-stream")
+
+
+@app.post("/wrapped/{league_key}/jobs", status_code=202)
+async def create_wrapped_job(
+    league_key: str,
+    authorization: Annotated[str | None, Header()] = None,
+    x_refresh_token: Annotated[str | None, Header()] = None,
+):
+    # Precomputes a wrapped off the request path, poll GET /jobs/{id} or open /wrapped/{league_key} to follow it
+    token = get_token(authorization, x_refresh_token)
+    if token is None:
+        return JSONResponse({"error": "Missing or invalid access token"}, 401)
+    job = await jobs.submit(league_key, token, detach=True)
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, 404)
+    return job
+
+
+@app.get("/metrics")
+async def get_metrics():
+    # Per-metric Yahoo usage and timings for Prometheus to scrape
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
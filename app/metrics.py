@@ -1,8 +1,84 @@
 from collections import defaultdict
+import asyncio
 from datetime import datetime, timedelta
+import heapq
+import numpy as np
 
 # import pandas as pd
 
+# Metrics methods that make up a wrapped in the order their slides are shown (query.METRICS_META), each returns a list
+# of {"id", "data"} results
+METRICS = [
+    "get_standings",
+    "get_alternative_realities",
+    "get_draft_busts_steals",
+    "get_team_season_data",
+    "get_biggest_comebacks",
+    "get_worst_drops",
+    # "get_most_dropped_players",
+    # "get_best_worst_drafts",
+    # "get_closest_matchups",
+    # "get_biggest_blowout_matchups",
+    # "get_rivalry_dominance",
+]
+
+# Datasets (see query.DATASETS) each metric reads through Query.get_dataset. Query.get_metrics starts a metric as soon
+# as its datasets are loaded and each dataset is loaded once however many metrics read it. Metrics that only read the
+# league loaded by Query.create, or that stream their own weekly requests, start right away.
+METRIC_DATASETS = {
+    "get_standings": (),
+    "get_alternative_realities": (),
+    "get_draft_busts_steals": ("draft_results", "draft_players"),
+    "get_team_season_data": (),
+    "get_biggest_comebacks": (),
+    "get_worst_drops": ("transactions",),
+    "get_most_dropped_players": ("transactions",),
+    "get_best_worst_drafts": ("draft_results", "draft_players"),
+    "get_closest_matchups": (),
+    "get_biggest_blowout_matchups": (),
+    "get_rivalry_dominance": (),
+}
+
+
+def get_schedule_swap_matrix(points, opponents):
+    """
+    points (float[teams][weeks]): Points scored by each team every week
+    opponents (int[teams][weeks]): Index of each team's opponent every week, -1 if the team had no matchup
+    Weeks from several seasons can be concatenated for an all-time matrix.
+    Returns:
+    win_pcts (float[teams][teams]): Win percentage of team i if it had played team j's schedule, ties count as half a win
+    """
+    num_teams, num_weeks = points.shape
+    has_opp = opponents >= 0
+    # opp_points[j, w]: points scored by team j's opponent in week w
+    opp_points = points[np.where(has_opp, opponents, 0), np.arange(num_weeks)]
+    team_points = points[:, None, :]  # [i, 1, w]
+    results = np.where(
+        team_points > opp_points[None, :, :],
+        1.0,
+        np.where(team_points == opp_points[None, :, :], 0.5, 0.0),
+    )  # [i, j, w]
+    # Skip weeks where either team had no matchup or team j's opponent is team i itself
+    played = (
+        has_opp[:, None, :]
+        & has_opp[None, :, :]
+        & (opponents[None, :, :] != np.arange(num_teams)[:, None, None])
+    )
+    wins = (results * played).sum(axis=2)
+    games = played.sum(axis=2)
+    return np.divide(wins, games, out=np.zeros(wins.shape), where=games > 0)
+
+
+def get_max_deficits(points, winner_rows, loser_rows):
+    """
+    points (float[teams][days]): Points scored by each team every day the matchups were undecided
+    winner_rows, loser_rows (int[matchups]): Rows of each matchup's winner and loser in points
+    Returns:
+    max_deficits (float[matchups]): Largest running deficit each winner came back from, 0 if they never trailed
+    """
+    running_deficits = np.cumsum(points[loser_rows] - points[winner_rows], axis=1)
+    return running_deficits.max(axis=1, initial=0.0)
+
 
 class Metrics:
     def __init__(self, query):
@@ -23,66 +99,27 @@ class Metrics:
         """
         Returns:
         alternative_reality_matrix (float[][]): Matrix of records if each team had another teams schedule
-        team_order (str[]): list of team_keys indicating the order of teams in the matrix
+        team_order (str[]): list of team names (in standings order) indicating the order of teams in the matrix
         """
-        self.query.num_requests = 0
-        num_reg_weeks = self.query.playoff_start_week - self.query.league_start_week
-        weeks = ",".join(
-            [
-                str(week)
-                for week in range(
-                    self.query.league_start_week, self.query.playoff_start_week
-                )
-            ]
-        )
-        url = f"/league/{self.query.league_key}/scoreboard;week={weeks}/matchups"
-        response = await self.query.get_response(url)
-        matchups = response["league"]["scoreboard"]["matchups"]
-        team_schedules = defaultdict(lambda: {"points": [], "opponent": []})
-        for matchup in matchups:
-            teams = matchup["teams"]
-            team_schedules[teams[0]["team_key"]]["points"].append(
-                float(teams[0]["team_points"]["total"])
-            )
-            team_schedules[teams[1]["team_key"]]["points"].append(
-                float(teams[1]["team_points"]["total"])
-            )
-            team_schedules[teams[0]["team_key"]]["opponent"].append(
-                {
-                    "key": teams[1]["team_key"],
-                    "points": float(teams[1]["team_points"]["total"]),
-                }
-            )
-            team_schedules[teams[1]["team_key"]]["opponent"].append(
-                {
-                    "key": teams[0]["team_key"],
-                    "points": float(teams[0]["team_points"]["total"]),
-                }
-            )
+        team_index = self.query.team_index
+        num_weeks = self.query.playoff_start_week - self.query.league_start_week
+        # Pack the regular season into (teams x weeks) arrays, the full season scoreboard is already loaded
+        points = np.zeros((len(team_index), num_weeks))
+        opponents = np.full((len(team_index), num_weeks), -1)
+        for matchup in self.query.matchups:
+            week = matchup.week - self.query.league_start_week
+            if week >= num_weeks:
+                continue
+            team_a, team_b = matchup.teams
+            a, b = team_index[team_a.team_key], team_index[team_b.team_key]
+            points[a, week], points[b, week] = team_a.points, team_b.points
+            opponents[a, week], opponents[b, week] = b, a
+        win_pcts = get_schedule_swap_matrix(points, opponents)
         team_schedule_matrix = [
-            [0 for _ in range(len(self.query.teams))]
-            for _ in range(len(self.query.teams))
-        ]
-        for i, [team_a_key, team_a] in enumerate(team_schedules.items()):
-            for j, team_b in enumerate(team_schedules.values()):
-                results = [
-                    (
-                        0.5
-                        if team_a_pts == team_opp["points"]
-                        else team_a_pts > team_opp["points"]
-                    )
-                    for team_a_pts, team_opp in zip(
-                        team_a["points"], team_b["opponent"]
-                    )
-                    if team_opp["key"] != team_a_key
-                ]
-                percent = format(round(sum(results) / len(results), 3), ".3f")
-                team_schedule_matrix[i][j] = percent
-        team_order = [
-            self.query.get_team_name_from_key(team_key)
-            for team_key in team_schedules.keys()
+            [format(round(win_pct, 3), ".3f") for win_pct in row]
+            for row in win_pcts.tolist()
         ]
-        # print(f'Alternative Realities: {self.query.num_requests}')
+        team_order = [team["name"] for team in self.query.teams]
         return [
             {
                 "id": "alternative_realities",
@@ -95,74 +132,62 @@ class Metrics:
         """
         Biggest draft busts/steals
         """
-        self.query.num_requests = 0
-        # Get draft results
-        url = f"/league/{self.query.league_key}/draftresults"
-        response = await self.query.get_response(url)
-        draft_results = response["league"]["draft_results"]
+        draft_results = await self.query.get_dataset("draft_results")
         # draft results doesn't return player stats
-        draft_player_keys = [
-            draft_result["player_key"] for draft_result in draft_results
-        ]
-        draft_players = await self.query.get_players(draft_player_keys)
-        # Add some way to refeerence back to the team that drafted each player
-        for draft_player, draft_results in zip(
-            draft_players, draft_results
-        ):  # TODO: See if using list comprehension would be faster, would be moree memory intensive
-            draft_player["team_key"] = draft_results["team_key"]
+        draft_players = await self.query.get_dataset("draft_players")
+        # Joined on player_key as Yahoo can leave players out of the batched responses
+        players_by_key = {player.player_key: player for player in draft_players}
         draft_players_by_pos = defaultdict(list)
         positions_map = {"C": "F", "LW": "F", "RW": "F", "D": "D", "G": "G"}
-        for draft_player in draft_players:
-            draft_players_by_pos[
-                positions_map[draft_player["primary_position"]]
-            ].append(draft_player)
+        for draft_result in draft_results:
+            draft_player = players_by_key.get(draft_result.player_key)
+            if draft_player is None:
+                continue
+            # Keep the team that drafted each player alongside it, in draft order
+            draft_players_by_pos[positions_map[draft_player.primary_position]].append(
+                (draft_result.team_key, draft_player)
+            )
         # Get the top players by position
-        top_players_by_pos = {
-            "F": await self.query.get_top_n_players_by_position(
-                len(draft_players_by_pos["F"]), "F"
-            ),
-            "D": await self.query.get_top_n_players_by_position(
-                len(draft_players_by_pos["D"]), "D"
-            ),
-            "G": await self.query.get_top_n_players_by_position(
-                len(draft_players_by_pos["G"]), "G"
-            ),
-        }
+        positions = ["F", "D", "G"]
+        top_players = await asyncio.gather(
+            *(
+                self.query.get_top_n_players_by_position(
+                    len(draft_players_by_pos[pos]), pos
+                )
+                for pos in positions
+            )
+        )
+        top_players_by_pos = dict(zip(positions, top_players))
         # Get differences between draft player and top player
         diffs = []
         for pos in draft_players_by_pos:
-            for draft_player, top_player in zip(
+            for [team_key, draft_player], top_player in zip(
                 draft_players_by_pos[pos], top_players_by_pos[pos]
             ):
-                diff = round(
-                    float(draft_player["player_points"][0]["total"])
-                    - float(top_player["player_points"][0]["total"]),
-                    1,
-                )
-                diffs.append((diff, draft_player))
+                diff = round(draft_player.points - top_player.points, 1)
+                diffs.append((diff, team_key, draft_player))
         smallest_diff = sorted(diffs, key=lambda x: x[0])
         biggest_diff = sorted(diffs, reverse=True, key=lambda x: x[0])
         draft_busts = [
             {
                 "rank": i + 1,
-                "image_url": player["image_url"],
-                "main_text": player["name"]["full"],
-                "sub_text": self.query.get_team_name_from_key(player["team_key"]),
+                "image_url": player.image_url,
+                "main_text": player.name,
+                "sub_text": self.query.get_team_name_from_key(team_key),
                 "stat": f"{format(diff, '.1f')} pts",
             }
-            for i, [diff, player] in enumerate(smallest_diff[:5])
+            for i, [diff, team_key, player] in enumerate(smallest_diff[:5])
         ]
         draft_steals = [
             {
                 "rank": i + 1,
-                "image_url": player["image_url"],
-                "main_text": player["name"]["full"],
-                "sub_text": self.query.get_team_name_from_key(player["team_key"]),
+                "image_url": player.image_url,
+                "main_text": player.name,
+                "sub_text": self.query.get_team_name_from_key(team_key),
                 "stat": f"+{format(diff, '.1f')} pts",
             }
-            for i, [diff, player] in enumerate(biggest_diff[:5])
+            for i, [diff, team_key, player] in enumerate(biggest_diff[:5])
         ]
-        # print(f'Draft Busts/Steals: {self.query.num_requests}')
         return [
             {"id": "draft_busts", "data": draft_busts},
             {"id": "draft_steals", "data": draft_steals},
@@ -175,85 +200,60 @@ class Metrics:
         Player that contributed most to each team
         Team with most hits
         """
-        self.query.num_requests = 0
-        HITS_STAT_ID = 31
         hits_by_team = defaultdict(int)
         top_player_by_team = {}
-        opp_players_by_team = defaultdict(
-            lambda: defaultdict(lambda: {"name": None, "image_url": None, "points": 0})
-        )
-        for team in self.query.teams:
-            team_points_by_nhl_team = defaultdict(float)
-            team_points_by_player = defaultdict(
-                lambda: {"name": None, "image_url": None, "points": 0}
-            )
-            for week in range(
-                self.query.league_start_week, self.query.league_end_week + 1
-            ):
-                opp_team = self.query.get_opp_team_by_week(team["team_key"], week)
+        # {[team_key: str]: {[player_key: str]: points: float}}
+        points_by_team = defaultdict(lambda: defaultdict(float))
+        opp_points_by_team = defaultdict(lambda: defaultdict(float))
+        players = {}  # {[player_key: str]: PlayerStats} name and image of every scorer
+        # One league wide roster request per week, each week is tallied as soon as it arrives
+        async for week, roster_players in self.query.iter_league_rosters():
+            for player in roster_players:
+                opp_team = self.query.get_opp_team_by_week(player.team_key, week)
                 if not opp_team:
                     # Means this team had no matchup for the current week, skip
                     continue
-                week_end_date = self.query.get_dates_by_week(week)[-1]
-                url = f"/team/{team['team_key']}/roster;week={week}/players/stats;type=week;week={week}"
-                response = await self.query.get_response(url)
-                roster_players = response["team"]["roster"]["players"]
-                for player in roster_players:
-                    hits_by_team[team["team_key"]] += next(
-                        iter(
-                            [
-                                int(stat["value"])
-                                for stat in player["player_stats"][0]["stats"]
-                                if int(stat["stat_id"]) == HITS_STAT_ID
-                                and stat["value"] != "-"
-                            ]
-                        ),
-                        0,
-                    )
-
-                    if not player["player_points"][0]["total"]:
-                        # Can skip rest if no points
-                        continue
+                hits_by_team[player.team_key] += player.hits
 
-                    # Team points by player
-                    if team_points_by_player[player["player_key"]]["name"] is None:
-                        team_points_by_player[player["player_key"]]["name"] = player[
-                            "name"
-                        ]["full"]
-                        team_points_by_player[player["player_key"]]["image_url"] = (
-                            player["image_url"]
-                        )
-                    team_points_by_player[player["player_key"]]["points"] += float(
-                        player["player_points"][0]["total"]
-                    )
+                if not player.points:
+                    # Can skip rest if no points
+                    continue
+                players.setdefault(player.player_key, player)
+                # Team points by player
+                points_by_team[player.team_key][player.player_key] += player.points
+                # Team points by opposing player
+                opp_points_by_team[opp_team][player.player_key] += player.points
 
-                    # Team points by opposing player
-                    if (
-                        opp_players_by_team[opp_team][player["player_key"]]["name"]
-                        is None
-                    ):
-                        opp_players_by_team[opp_team][player["player_key"]]["name"] = (
-                            player["name"]["full"]
-                        )
-                        opp_players_by_team[opp_team][player["player_key"]][
-                            "image_url"
-                        ] = player["image_url"]
-                    opp_players_by_team[opp_team][player["player_key"]][
-                        "points"
-                    ] += float(player["player_points"][0]["total"])
+                # Team points by NHL team
+                # week_end_date = self.query.get_dates_by_week(week)[-1]
+                # player_game_log = await self.query.get_game_log_by_player(player.player_key, player.name, player.display_position)
+                # nhl_team = self.query.get_player_team_on_date(player_game_log, week_end_date)
+                # team_points_by_nhl_team[nhl_team] += player.points
 
-                    # Team points by NHL team
-                    # player_game_log = self.query.get_game_log_by_player(player["player_key"], player["name"]["full"], player["display_position"])
-                    # nhl_team = self.query.get_player_team_on_date(player_game_log, week_end_date)
-                    # team_points_by_nhl_team[nhl_team] += float(player["player_points"][0]["total"])
+        def get_points_by_player(points_by_player):
+            """
+            Returns:
+            [{"name", "image_url", "points"}] sorted by points, ties in player_key order
+            """
+            return [
+                {
+                    "name": players[player_key].name,
+                    "image_url": players[player_key].image_url,
+                    "points": points,
+                }
+                for player_key, points in sorted(
+                    points_by_player.items(),
+                    key=lambda item: (-round(item[1], 1), item[0]),
+                )
+            ]
 
+        for team in self.query.teams:
+            team_points_by_nhl_team = defaultdict(float)
             team_points_by_nhl_team = sorted(
                 team_points_by_nhl_team.items(), key=lambda item: item[1], reverse=True
             )
-            team_points_by_player = sorted(
-                team_points_by_player.values(),
-                key=lambda value: value["points"],
-                reverse=True,
+            team_points_by_player = get_points_by_player(
+                points_by_team[team["team_key"]]
             )
             # top_nhl_team = team_points_by_nhl_team[0][0]
             # top_nhl_team_pct = round(team_points_by_nhl_team[0][1]/sum([row[1] for row in team_points_by_nhl_team])*100)
@@ -282,11 +282,17 @@ class Metrics:
             for i, [k, v] in enumerate(top_player_by_team_sorted)
         ]
         top_opp_player_by_team = {
-            k: sorted(v.values(), key=lambda x: x["points"], reverse=True)[0]
-            for k, v in opp_players_by_team.items()
+            team["team_key"]: get_points_by_player(
+                opp_points_by_team[team["team_key"]]
+            )[0]
+            for team in self.query.teams
+            if opp_points_by_team[team["team_key"]]
         }
+        # Sums depend on the order weeks arrived in, rank on the displayed precision so ties stay in team order
         top_opp_player_by_team_sorted = sorted(
-            top_opp_player_by_team.items(), key=lambda x: x[1]["points"], reverse=True
+            top_opp_player_by_team.items(),
+            key=lambda x: round(x[1]["points"], 1),
+            reverse=True,
         )
         top_opp_player_by_team_sorted_ret = [
             {
@@ -298,7 +304,6 @@ class Metrics:
             }
             for i, [k, v] in enumerate(top_opp_player_by_team_sorted)
         ]
-        # print(f'Top Players: {self.query.num_requests}')
         return [
             {"id": "one_man_army", "data": top_player_by_team_sorted_ret},
             {"id": "team_tormentor", "data": top_opp_player_by_team_sorted_ret},
@@ -307,227 +312,150 @@ class Metrics:
     async def get_biggest_comebacks(self):
         """
         Biggest comeback
-        52.8s
+        52.8s when the whole season was fetched as one response, weeks are now processed as their daily points arrive
         """
-        self.query.num_requests = 0
-        deficits = []
-        all_teams_daily_stats = await self.query.get_all_teams_daily_stats()
-        for matchup in self.query.matchups:
+        matchups_by_week = defaultdict(list)  # {[week: int]: [(order: int, matchup)]}
+        for order, matchup in enumerate(self.query.matchups):
             # Comeback win can't happen without a winner
-            if int(matchup["is_tied"]):
-                continue
-            team_keys = [
-                matchup["teams"][0]["team_key"],
-                matchup["teams"][1]["team_key"],
-            ]
-            team_w_idx, team_l_idx = (
-                [0, 1] if team_keys[0] == matchup["winner_team_key"] else [1, 0]
+            if not matchup.is_tied:
+                matchups_by_week[matchup.week].append((order, matchup))
+        # Every matchup of a week spans the same days, don't include the last day since the matchup is over
+        dates_by_week = {}
+        for week, week_matchups in matchups_by_week.items():
+            matchup = week_matchups[0][1]
+            week_start = datetime.strptime(matchup.week_start, "%Y-%m-%d")
+            num_days = (
+                datetime.strptime(matchup.week_end, "%Y-%m-%d") - week_start
+            ).days
+            dates_by_week[week] = tuple(
+                (week_start + timedelta(days=i)).strftime("%Y-%m-%d")
+                for i in range(num_days)
             )
-            team_w_key, team_l_key = [team_keys[team_w_idx], team_keys[team_l_idx]]
-            deficit = 0
-            start_date = datetime.strptime(matchup["week_start"], "%Y-%m-%d")
-            end_date = datetime.strptime(matchup["week_end"], "%Y-%m-%d")
-            # Don't include the last day since the matchup is over
-            for i in range((end_date - start_date).days):
-                current_date_str = (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
-                team_w_points = all_teams_daily_stats[team_w_key][current_date_str]
-                team_l_points = all_teams_daily_stats[team_l_key][current_date_str]
-                deficit = round(deficit + team_l_points - team_w_points, 1)
+        comebacks = []  # [(deficit: float, order: int, matchup, team_w, team_l)]
+        async for week, _, points in self.query.iter_team_daily_points(dates_by_week):
+            week_matchups = []  # [(order: int, matchup, team_w, team_l)]
+            winner_rows, loser_rows = [], []
+            for order, matchup in matchups_by_week[week]:
+                team_w, team_l = (
+                    matchup.teams
+                    if matchup.teams[0].team_key == matchup.winner_team_key
+                    else reversed(matchup.teams)
+                )
+                week_matchups.append((order, matchup, team_w, team_l))
+                winner_rows.append(self.query.team_index[team_w.team_key])
+                loser_rows.append(self.query.team_index[team_l.team_key])
+            max_deficits = get_max_deficits(points, winner_rows, loser_rows)
+            for week_matchup, deficit in zip(week_matchups, max_deficits.tolist()):
+                deficit = round(deficit, 1)
                 if deficit > 0:
-                    deficits.append(
-                        (
-                            deficit,
-                            {
-                                "week": matchup["week"],
-                                "winner_team_key": matchup["winner_team_key"],
-                                "team_image_url": matchup["teams"][team_w_idx][
-                                    "team_logos"
-                                ]["team_logo"]["url"],
-                                "team_name": matchup["teams"][team_w_idx]["name"],
-                                "opp_team_name": matchup["teams"][team_l_idx]["name"],
-                            },
-                        )
-                    )
-        biggest_deficits = sorted(
-            deficits, key=lambda x: x[0]
-        )  # This needs to be in ascending order so when duplicates are removed only the last (largest) is kept
-        biggest_deficits = list(
-            {
-                f'{matchup["week"]}.{matchup["winner_team_key"]}': (deficit, matchup)
-                for (deficit, matchup) in biggest_deficits
-            }.values()
-        )  # This removes duplicates from same matchup
-        biggest_deficits = sorted(biggest_deficits, reverse=True, key=lambda x: x[0])
+                    comebacks.append((deficit, *week_matchup))
+        # Ties go to the earlier matchup
+        biggest_comebacks = heapq.nlargest(
+            5, comebacks, key=lambda comeback: (comeback[0], -comeback[1])
+        )
         biggest_combacks = [
             {
                 "rank": i + 1,
-                "image_url": matchup["team_image_url"],
-                "main_text": matchup["team_name"],
-                "sub_text": f'Week {matchup["week"]} vs {matchup["opp_team_name"]}',
+                "image_url": team_w.logo_url,
+                "main_text": team_w.name,
+                "sub_text": f"Week {matchup.week} vs {team_l.name}",
                 "stat": f"{format(deficit, '.1f')} pts",
             }
-            for i, [deficit, matchup] in enumerate(biggest_deficits[:5])
+            for i, (deficit, _, matchup, team_w, team_l) in enumerate(biggest_comebacks)
         ]
-        # print(f'Biggest Comebacks: {self.query.num_requests}')
         return [{"id": "biggest_comeback", "data": biggest_combacks}]
 
     async def get_worst_drops(self):
-        async def update_drop_players_points(drop_players_dict, dates):
-            players = list(drop_players_dict.keys())
-            drop_players_points_cur = await self.query.get_players_points_by_date(
-                players, dates
-            )
-            for player_key, drop_player in drop_players_points_cur.items():
-                for team_key in drop_players_dict[player_key]:
-                    key = player_key + team_key
-                    if key not in drop_players_points:
-                        drop_players_points[key]["player_name"] = drop_player["name"]
-                        drop_players_points[key]["image_url"] = drop_player["image_url"]
-                        drop_players_points[key]["team_name"] = (
-                            self.query.get_team_name_from_key(team_key)
-                        )
-                    drop_players_points[key]["points"] = round(
-                        drop_players_points[key]["points"] + drop_player["points"], 1
+        """
+        The one that got away
+        Points each dropped player scored from the day their team dropped them until that team added them back
+        """
+        league_start = datetime.strptime(self.query.league_start_date_str, "%Y-%m-%d")
+        league_end = datetime.strptime(self.query.league_end_date_str, "%Y-%m-%d")
+        num_days = (league_end - league_start).days + 1
+        transactions = await self.query.get_dataset("transactions")
+        dropped_on = {}  # {[(player_key, team_key)]: day: int} drops not yet undone
+        # {[(player_key, team_key)]: [(first_day: int, end_day: int)]} days since league start, end_day exclusive
+        intervals = defaultdict(list)
+        for transaction in reversed(transactions):
+            # Transactions before the league started count from its first day
+            day = (
+                datetime.fromtimestamp(transaction.timestamp).date()
+                - league_start.date()
+            ).days
+            day = min(max(day, 0), num_days)
+            for player in transaction.players:
+                if player.type == "drop":
+                    dropped_on.setdefault(
+                        (player.player_key, player.source_team_key), day
                     )
+                elif player.type == "add":
+                    key = (player.player_key, player.destination_team_key)
+                    first_day = dropped_on.pop(key, day)
+                    if first_day < day:
+                        intervals[key].append((first_day, day))
+        for key, first_day in dropped_on.items():
+            if first_day < num_days:
+                intervals[key].append((first_day, num_days))
+        if not intervals:
+            return [{"id": "the_one_that_got_away", "data": []}]
 
-        def get_dates(start_date, end_date):
-            return [
-                (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
-                for i in range((end_date.date() - start_date.date()).days)
-                if start_date + timedelta(days=i - 1)
-                < datetime.strptime(self.query.league_end_date_str, "%Y-%m-%d")
-            ]
-
-        self.query.num_requests = 0
-        url = f"/league/{self.query.league_key}/transactions"
-        response = await self.query.get_response(url)
-        transactions = list(reversed(response["league"]["transactions"]))
-        last_transaction_date = datetime.strptime(
-            self.query.league_start_date_str, "%Y-%m-%d"
-        )
-        drop_players_dict = defaultdict(set)
-        drop_players_remove = []
-        drop_players_points = defaultdict(
-            lambda: {
-                "player_name": None,
-                "image_url": None,
-                "team_name": None,
-                "points": 0,
-            }
-        )
-        done = False
-        for transaction in transactions:
-            if not "players" in transaction:
+        # Every dropped player's points are fetched once over the days any interval covers
+        first_day = min(first for spans in intervals.values() for first, _ in spans)
+        end_day = max(end for spans in intervals.values() for _, end in spans)
+        dates = [
+            (league_start + timedelta(days=day)).strftime("%Y-%m-%d")
+            for day in range(first_day, end_day)
+        ]
+        player_keys = list(dict.fromkeys(player_key for player_key, _ in intervals))
+        players, points = await self.query.get_players_daily_points(player_keys, dates)
+        # cumulative_points[row][day - first_day] is what the player scored before day
+        cumulative_points = np.zeros((len(player_keys), len(dates) + 1))
+        np.cumsum(points, axis=1, out=cumulative_points[:, 1:])
+        rows = {player_key: row for row, player_key in enumerate(player_keys)}
+        drops = []  # [(points: float, player_key, team_key)]
+        for (player_key, team_key), spans in intervals.items():
+            if player_key not in players:
                 continue
-            for player in transaction["players"]:
-                if player["transaction_data"]["type"] in ["add", "drop"]:
-                    if player["transaction_data"]["type"] == "add":
-                        # This needs to be at the top because team needs to get removed in current iteration
-                        drop_players_remove.append(
-                            {
-                                "player_key": player["player_key"],
-                                "team_key": player["transaction_data"][
-                                    "destination_team_key"
-                                ],
-                            }
-                        )
-                    transaction_date = datetime.fromtimestamp(
-                        int(transaction["timestamp"])
-                    )
-                    if transaction_date.strftime(
-                        "%Y-%m-%d"
-                    ) != last_transaction_date.strftime("%Y-%m-%d"):
-                        # If new date, calculate points accumulated by dropped players
-                        if (
-                            last_transaction_date > transaction_date
-                            and player["transaction_data"]["type"] == "drop"
-                        ):
-                            # Accounts for transactions before league start date
-                            drop_players_dict[player["player_key"]].add(
-                                player["transaction_data"]["source_team_key"]
-                            )
-                            continue
-                        elif last_transaction_date > transaction_date:
-                            continue
-                        dates = get_dates(last_transaction_date, transaction_date)
-                        await update_drop_players_points(drop_players_dict, dates)
-                        if transaction_date > datetime.strptime(
-                            self.query.league_end_date_str, "%Y-%m-%d"
-                        ):
-                            done = True
-                            break
-                        last_transaction_date = datetime.strptime(
-                            dates[-1], "%Y-%m-%d"
-                        ) + timedelta(days=1)
-                        for drop_player_remove in drop_players_remove:
-                            drop_players_dict[drop_player_remove["player_key"]].discard(
-                                drop_player_remove["team_key"]
-                            )
-                            if (
-                                len(drop_players_dict[drop_player_remove["player_key"]])
-                                == 0
-                            ):
-                                drop_players_dict.pop(
-                                    drop_player_remove["player_key"], None
-                                )
-                    if player["transaction_data"]["type"] == "drop":
-                        drop_players_dict[player["player_key"]].add(
-                            player["transaction_data"]["source_team_key"]
-                        )
-            if done:
-                break
-        if (
-            last_transaction_date.date()
-            != datetime.strptime(self.query.league_end_date_str, "%Y-%m-%d").date()
-        ):
-            # If last transaction was not on or past the league end date, get points until league end date
-            league_end_date = datetime.strptime(
-                self.query.league_end_date_str, "%Y-%m-%d"
+            player_points = cumulative_points[rows[player_key]]
+            drop_points = sum(
+                player_points[end - first_day] - player_points[first - first_day]
+                for first, end in spans
             )
-            dates = get_dates(last_transaction_date, league_end_date)
-            await update_drop_players_points(drop_players_dict, dates)
-        # print(self.query.num_requests)
-        worst_drops = sorted(
-            drop_players_points.values(), key=lambda x: x["points"], reverse=True
-        )[:10]
+            drops.append((round(float(drop_points), 1), player_key, team_key))
         worst_drops = [
             {
                 "rank": i + 1,
-                "image_url": worst_drop["image_url"],
-                "main_text": worst_drop["player_name"],
-                "sub_text": worst_drop["team_name"],
-                "stat": f'{worst_drop["points"]} pts',
+                "image_url": players[player_key].image_url,
+                "main_text": players[player_key].name,
+                "sub_text": self.query.get_team_name_from_key(team_key),
+                "stat": f"{drop_points} pts",
             }
-            for i, worst_drop in enumerate(worst_drops)
+            for i, (drop_points, player_key, team_key) in enumerate(
+                heapq.nlargest(10, drops, key=lambda drop: drop[0])
+            )
         ]
         return [{"id": "the_one_that_got_away", "data": worst_drops}]
 
     async def get_most_dropped_players(self):
-        url = f"/league/{self.query.league_key}/transactions"
-        response = await self.query.get_response(url)
-        transactions = response["league"]["transactions"]
+        transactions = await self.query.get_dataset("transactions")
         drops = {}
         missed = 0
         for transaction in transactions:
-            if (transaction["type"] == "drop") and transaction[
-                "status"
-            ] == "successful":
+            if (transaction.type == "drop") and transaction.status == "successful":
                 try:
-                    drops[transaction["players"][0]["player_key"]][1] += 1
+                    drops[transaction.players[0].player_key][1] += 1
                 except:
-                    drops[transaction["players"][0]["player_key"]] = [
-                        transaction["players"][0]["name"]["full"],
+                    drops[transaction.players[0].player_key] = [
+                        transaction.players[0].name,
                         1,
                     ]
-            elif (
-                transaction["type"] == "add/drop"
-                and transaction["status"] == "successful"
-            ):
+            elif transaction.type == "add/drop" and transaction.status == "successful":
                 try:
-                    drops[transaction["players"][1]["player_key"]][1] += 1
+                    drops[transaction.players[1].player_key][1] += 1
                 except:
-                    drops[transaction["players"][1]["player_key"]] = [
-                        transaction["players"][1]["name"]["full"],
+                    drops[transaction.players[1].player_key] = [
+                        transaction.players[1].name,
                         1,
                     ]
 
@@ -537,7 +465,7 @@ class Metrics:
         top_drops_list = [
             {
                 "rank": i + 1,
-                "image_url": players[i]["image_url"],
+                "image_url": players[i].image_url,
                 "main_text": list(drops.values())[i][0],
                 "sub_test": "",
                 "stat": f"{list(drops.values())[i][1]} add/drops",
@@ -548,43 +476,37 @@ class Metrics:
         return [{"id": "most_dropped", "data": top_drops_list}]
 
     async def get_best_worst_drafts(self):
-        url = f"/league/{self.query.league_key}/draftresults"
-        response = await self.query.get_response(url)
-        full_draft = response["league"]["draft_results"]
+        full_draft = await self.query.get_dataset("draft_results")
+        # Season stats of every pick, joined on player_key as Yahoo can leave players out
+        draft_players = await self.query.get_dataset("draft_players")
+        points_by_player = {
+            player.player_key: player.points for player in draft_players
+        }
         teams = self.query.get_teams()
         team_keys = tuple(teams.keys())
         team_drafts = {team_key: [] for team_key in team_keys}
         for i in range(len(full_draft)):
-            team_drafts[full_draft[i]["team_key"]].append(full_draft[i])
+            team_drafts[full_draft[i].team_key].append(full_draft[i])
         ranked_drafts_list = []
         i = 0
         for team, draft in team_drafts.items():
             # print(team, draft)
-            player_keys = [pick['player_key'] for pick in draft]
-            stats = await self.query.get_players(player_keys=player_keys)
             # pprint(query.teams)
             ranked_drafts_list.append(
                 {
                     "rank": 0,
-                    "image_url": self.query.teams[
-                        next(
-                                (
-                                    i
-                                    for i, t in enumerate(self.query.teams)
-                                    if t["team_key"] == team
-                                ),
-                                None,
-                            )
-                        ]["team_logos"]["team_logo"]["url"],
+                    "image_url": self.query.teams_by_key[team]["team_logos"][
+                        "team_logo"
+                    ]["url"],
                     "main_text": self.query.get_team_name_from_key(team),
                     "sub_text": "",
                     "stat": 0,
                 }
             )
             i += 1
-            for j in range(len(draft)):
+            for pick in draft:
                 ranked_drafts_list[len(ranked_drafts_list) - 1]["stat"] += round(
-                    float(stats[j]["player_points"][0]["total"]), 1
+                    points_by_player.get(pick.player_key, 0.0), 1
                 )
         ranked_drafts_list = sorted(
             ranked_drafts_list, key=lambda item: list(item.items())[4][1], reverse=False
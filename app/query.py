@@ -1,59 +1,347 @@
-import requests
-from collections import defaultdict
 from datetime import datetime, timedelta
 import asyncio
+import contextvars
 import json
+import os
+import time
+from types import MappingProxyType
 import aiohttp
+import numpy as np
 
-from auth import authenticate
-from utils import xml_to_dict
-from metrics import Metrics
+from auth import CLIENT_ID, authenticate
+from utils import XmlDecoder, normalize_name, read_json_file, write_json_file
+from extractors import (
+    ScoreboardExtractor,
+    PlayerStatsExtractor,
+    DailyPointsExtractor,
+    TransactionsExtractor,
+    DraftResultsExtractor,
+)
+from metrics import Metrics, METRICS, METRIC_DATASETS
+from instrumentation import current_span, metric_span
+from http_session import get_session
+from token_manager import token_manager
+from rate_limit import (
+    MAX_RETRIES,
+    RETRY_STATUSES,
+    THROTTLE_STATUSES,
+    get_app_limiter,
+    get_backoff,
+    get_circuit_breaker,
+    get_user_limiter,
+    PrioritySemaphore,
+)
 
-BASE_URL = "https://fantasysports.yahooapis.com/fantasy/v2"
+# Point at a local stand-in (tests/yahoo_stand_in.py) to run offline
+BASE_URL = os.getenv("YAHOO_BASE_URL", "https://fantasysports.yahooapis.com/fantasy/v2")
+MAX_CONCURRENT_REQUESTS = 10  # Upper bound on in-flight Yahoo requests per Query
+RESPONSE_CHUNK_SIZE = 64 * 1024  # Bytes handed to the XML decoder at a time
+NHL_MAX_CONCURRENT_REQUESTS = 5  # Upper bound on in-flight NHL API requests per Query
+NHL_GAME_LOG_CACHE_DIR = os.getenv("NHL_GAME_LOG_CACHE_DIR", "nhl_game_logs")
+# Inputs shared between metrics, {[name: str]: (Query loader method, datasets passed to the loader)}
+DATASETS = {
+    "transactions": ("load_transactions", ()),
+    "draft_results": ("load_draft_results", ()),
+    "draft_players": ("load_draft_players", ("draft_results",)),
+}
+# Slides in the order the UI shows them, {[slide id: str]: {title, description, type}}
+METRICS_META = {
+    "official_standings": {
+        "title": '"Official" Results',
+        "description": "Sure, these are the official results. But were they really the best team? The luckiest? The biggest flop? Keep scrolling to uncover the real winners and losers of the season.",
+        "type": "list",
+    },
+    "alternative_realities": {
+        "title": "Alternative Realities",
+        "description": "What if your team had a different schedule? This matrix reimagines the season by swapping team schedules, showing how records would have changed in an alternate universe. Did bad luck hold you back, or were you truly dominant no matter the matchups?",
+        "type": "table",
+    },
+    "draft_steals": {
+        "title": "Draft Steal",
+        "description": "Some picks turn out to be absolute gems! This metric highlights the player who delivered the biggest return on investment, massively outperforming their draft position. Whether it was a late-round sleeper who dominated or a mid-round pick who played like a first-rounder, this is your league's ultimate steal of the draft.",
+        "type": "list",
+    },
+    "draft_busts": {
+        "title": "Draft Bust",
+        "description": "Not all picks live up to the hype. This metric identifies the player who fell the hardest from expectations, drastically underperforming their draft position. Whether it was due to injuries, poor form, or just bad luck, this was the pick that stung the most for fantasy managers.",
+        "type": "list",
+    },
+    "one_man_army": {
+        "title": "One-Man Army",
+        "description": "This metric highlights the player who carried the biggest scoring burden for their team by contributing the highest percentage of their team’s total points. It showcases which players were the most crucial to their team’s success, whether due to elite performance or a lack of supporting cast. A high percentage means this player was the go-to option, shouldering most of the team’s fantasy production.",
+        "type": "list",
+    },
+    "team_tormentor": {
+        "title": "Team Tormentor",
+        "description": "This metric identifies the player who scored the most total points against a single team, revealing their toughest matchup.",
+        "type": "list",
+    },
+    "biggest_comeback": {
+        "title": "Greatest Comebacks",
+        "description": "The most impressive turnarounds of the season! This stat highlights the teams that overcame the largest point deficits to secure a victory in a single week, proving that no lead is ever safe.",
+        "type": "list",
+    },
+    "the_one_that_got_away": {
+        "title": "The One That Got Away",
+        "description": 'These players were the ultimate "what could have been" stories of the season. After being dropped, they went on to rack up the most points—leaving their former managers with major regret.',
+        "type": "list",
+    },
+    "most_dropped": {
+        "title": "Hot Potato",
+        "description": "These players just couldn’t find a permanent home! This metric highlights the most frequently added and dropped players of the season, showing which names cycled through the league the most.",
+        "type": "list",
+    },
+    "best_drafts": {
+        "title": "Draft Guru",
+        "description": "Some managers are elite scouts and have a keen eye for talent! Let's take a look at who had the best drafts in your league (let's just hope they didn't drop their drafted players)",
+        "type": "list",
+    },
+    "worst_drafts": {
+        "title": "Bench Builder",
+        "description": "Now lets take a look at the managers who really laid an egg on draft day (maybe do some research next time)",
+        "type": "list",
+    }, 
+    "closest_matchups": {
+        "title": "A Win is a Win",
+        "description": "There were some real barn burner matchups this year! Here is a look at this year's closest weekly matchups.",
+        "type": "list",
+    },
+    "biggest_blowouts": {
+        "title": "Biggest Blowouts",
+        "description": "Now looking at the opposite of barn burners, let's take a look at who got boat raced this year.",
+        "type": "list",
+    },
+    "rivalry_dominance": {
+        "title": "Pure Dominance",
+        "description": "Think Canada Hockey vs USA Hockey, Pakcers vs Bears, or Globetrotters vs Generals. Some teams never stood a chance against their rival. Take a look at these matchups with one team completely dominating the other (don't forget to give your friend a hard time for this one).",
+        "type": "list",
+    },
+}
+SLIDE_POSITIONS = {slide: position for position, slide in enumerate(METRICS_META)}
+# Slide json (cached json included) has no id but titles are unique
+SLIDE_POSITIONS_BY_TITLE = {
+    meta["title"]: position for position, meta in enumerate(METRICS_META.values())
+}
+# Seconds a finished metric waits for the slides before it, after which it's sent out of order with its position
+MAX_HEAD_OF_LINE_WAIT = float(os.getenv("MAX_HEAD_OF_LINE_WAIT", "2.0"))
+# Position in METRICS of the metric issuing a request, requests for earlier slides get a free connection first
+request_priority = contextvars.ContextVar("request_priority", default=0)
 
 
 class Query:
     def __init__(self, league_key, token, doc_ref):
-        self.num_requests = 0
         self.league_key = league_key
         self.game_id, _, self.league_id = league_key.split(".")
-        self.game_logs_cache = {}
+        self.game_logs_cache = {}  # {[player_key: str]: asyncio.Task}
         self.doc_ref = doc_ref
         self.player_points_by_date = {}
+        # Refreshed through token_manager once Yahoo rejects the token
         self.oauth = authenticate(token)
-        self.oauth.refresh_access_token()  # Initialize self.token_time
-        self.session = (
-            aiohttp.ClientSession()
-        )  # Need to use Peresistent session rather that "with" which automatically closes session TODO: handle retry
+        self.semaphore = PrioritySemaphore(MAX_CONCURRENT_REQUESTS)
+        self.nhl_semaphore = asyncio.Semaphore(NHL_MAX_CONCURRENT_REQUESTS)
+        # {[(url, decoder)]: asyncio.Task} shared by all metrics
+        self.response_cache = {}
+        self.dataset_cache = {}  # {[name: str]: asyncio.Task}
+        # Shared with every other Query in the process using the same app key/user token
+        self.app_limiter = get_app_limiter(CLIENT_ID)
+        self.user_limiter = get_user_limiter(
+            (token.get("refresh_token") or token["access_token"]) if token else "local"
+        )
+        self.circuit_breaker = get_circuit_breaker(CLIENT_ID)
+        self.session = get_session()  # Borrowed, closed when the app shuts down
 
     @classmethod
     async def create(cls, league_key, token=None, doc_ref=None):
         # Handles async opereations on initialization
         instance = cls(league_key, token, doc_ref)
 
-        await instance.get_league()
-        instance.matchups = await instance.get_matchups()
-        instance.game_weeks = await instance.get_game_weeks()
+        try:
+            with metric_span("query_setup", league_key, phase="setup"):
+                await instance.get_league()
+                instance.matchups = await instance.get_matchups()
+                instance.game_weeks = await instance.get_game_weeks()
+                instance.build_indexes()
+        except asyncio.CancelledError:
+            await instance.close()
+            raise
 
         return instance
 
-    async def get_response(self, url):
-        self.num_requests += 1
-        if not self.oauth.token_is_valid():
-            self.oauth.refresh_access_token()
+    async def close(self):
+        """
+        Cancels every request still in flight, the shared session stays open for other Query instances
+        """
+        tasks = [
+            task
+            for cache in (self.response_cache, self.dataset_cache, self.game_logs_cache)
+            for task in cache.values()
+            if not task.done()
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_response(self, url, decoder=XmlDecoder):
+        """
+        Returns the response for url decoded by decoder, fetching it at most once per Query.
+        decoder is XmlDecoder for generic dicts or one of the typed extractors in extractors.py for hot endpoints.
+        Concurrent callers for the same url share a single in-flight request and every later caller gets the cached result,
+        so the returned data is shared between metrics and must be treated as read-only.
+        """
+        span = current_span.get()
+        if span and (url, decoder) in self.response_cache:
+            span.cache_hits += 1
+        return await self.single_flight(
+            self.response_cache,
+            (url, decoder),
+            lambda: self.fetch_response(url, decoder),
+        )
+
+    async def get_dataset(self, name):
+        """
+        Returns the DATASETS[name] dataset, loading it and the datasets it depends on at most once per Query
+        """
+        return await self.single_flight(
+            self.dataset_cache, name, lambda: self.load_dataset(name)
+        )
+
+    async def load_dataset(self, name):
+        loader, dependencies = DATASETS[name]
+        inputs = await asyncio.gather(*(self.get_dataset(dep) for dep in dependencies))
+        return await getattr(self, loader)(*inputs)
+
+    async def load_transactions(self):
+        """
+        Returns:
+            [Transaction] newest first
+        """
+        url = f"/league/{self.league_key}/transactions"
+        return await self.get_response(url, TransactionsExtractor)
+
+    async def load_draft_results(self):
+        """
+        Returns:
+            [DraftPick] in draft order
+        """
+        url = f"/league/{self.league_key}/draftresults"
+        return await self.get_response(url, DraftResultsExtractor)
+
+    async def load_draft_players(self, draft_results):
+        """
+        Returns:
+            [PlayerStats] season stats of the drafted players, Yahoo can leave players out so join on player_key
+        """
+        return await self.get_players([pick.player_key for pick in draft_results])
+
+    async def single_flight(self, cache, key, fetch):
+        """
+        Awaits fetch() at most once per key, concurrent and later callers share the cached task
+        """
+        task = cache.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            task.add_done_callback(lambda task: self.evict_failed(cache, key, task))
+            cache[key] = task
+        # Shield so one cancelled caller doesn't cancel the request for everyone else waiting on it
+        return await asyncio.shield(task)
 
+    def evict_failed(self, cache, key, task):
+        # Don't cache failures, the next caller should retry the request
+        if (task.cancelled() or task.exception()) and cache.get(key) is task:
+            del cache[key]
+
+    async def fetch_response(self, url, decoder):
+        """
+        Retries throttled (999/429), transient 5xx and connection failures with jittered exponential backoff.
+        Requests are paced by the rate limiters shared across the process and fail fast with YahooUnavailableError
+        while the circuit breaker is open.
+        """
+        attempt = 0
+        refreshed = False
+        # Checked once per request so a probe can retry like any other request
+        probe = self.circuit_breaker.check()
+        try:
+            while True:
+                await self.app_limiter.acquire()
+                await self.user_limiter.acquire()
+                access_token = token_manager.get_access_token(self.oauth)
+                try:
+                    data = await self.fetch_response_once(url, decoder, access_token)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status = getattr(e, "status", None)
+                    if status == 401 and not refreshed:
+                        # Expired access token, refresh it (once for all concurrent requests) and try again
+                        refreshed = True
+                        await token_manager.refresh(self.oauth, access_token)
+                        continue
+                    if status is not None and status not in RETRY_STATUSES:
+                        raise
+                    if status in THROTTLE_STATUSES:
+                        self.app_limiter.throttled()
+                        self.user_limiter.throttled()
+                    if attempt == MAX_RETRIES:
+                        self.circuit_breaker.record_failure()
+                        raise
+                    headers = getattr(e, "headers", None) or {}
+                    delay = get_backoff(attempt, headers.get("Retry-After"))
+                    print(f"Retrying {url} in {delay:.2f}s after {status or repr(e)}")
+                    span = current_span.get()
+                    if span:
+                        span.retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                else:
+                    self.circuit_breaker.record_success()
+                    self.app_limiter.succeeded()
+                    self.user_limiter.succeeded()
+                    return data
+        finally:
+            if probe:
+                self.circuit_breaker.end_probe()
+
+    async def fetch_response_once(self, url, decoder, access_token):
         headers = {
-            "Authorization": f"Bearer {self.oauth.access_token}",
+            "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",  # TODO: remove
         }
-        async with self.session.get(BASE_URL + url, headers=headers) as response:
-            xml = await response.text()
-            if response.status != 200:
-                print(response)
-                print(xml)
-                response.raise_for_status()
-            data = xml_to_dict(xml)
-            return data
+        span = current_span.get()
+        async with self.semaphore.slot(request_priority.get()):
+            if span:
+                span.request_started()
+            start = time.perf_counter()
+            num_bytes = 0
+            parse_seconds = 0.0
+            try:
+                async with self.session.get(
+                    BASE_URL + url, headers=headers
+                ) as response:
+                    if response.status != 200:
+                        print(response.status, await response.text())
+                        response.raise_for_status()
+                    # Decode while downloading rather than after the whole body has arrived
+                    stream = decoder()
+                    async for chunk in response.content.iter_chunked(
+                        RESPONSE_CHUNK_SIZE
+                    ):
+                        num_bytes += len(chunk)
+                        parse_start = time.perf_counter()
+                        stream.feed(chunk)
+                        parse_seconds += time.perf_counter() - parse_start
+            finally:
+                if span:
+                    latency = time.perf_counter() - start - parse_seconds
+                    span.request_finished(latency, num_bytes, parse_seconds)
+        parse_start = time.perf_counter()
+        data = stream.close()
+        if span:
+            span.parse_seconds += time.perf_counter() - parse_start
+        return data
+
+    async def get_responses(self, urls, decoder=XmlDecoder):
+        """
+        Issues all urls concurrently (bounded by MAX_CONCURRENT_REQUESTS) and returns the responses in the same order
+        """
+        return await asyncio.gather(*(self.get_response(url, decoder) for url in urls))
 
     async def get_league(self):
         url = f"/league/{self.league_key};out=standings,settings"
@@ -72,6 +360,7 @@ class Query:
         }
 
         self.league_season = int(league["season"])
+        self.league_is_finished = league.get("is_finished") == "1"
         self.teams = league["standings"]["teams"]
 
         weeks = ",".join(
@@ -79,31 +368,55 @@ class Query:
             for week in range(self.league_start_week, self.league_end_week + 1)
         )
         url = f"/league/{self.league_key}/scoreboard;week={weeks}"
-        response = await self.get_response(url)
-        self.scoreboard = response["league"]["scoreboard"]["matchups"]
+        self.scoreboard = await self.get_response(url, ScoreboardExtractor)
 
     async def get_game_weeks(self):
         url = f"/game/{self.game_id}/game_weeks"
         response = await self.get_response(url)
-        game_weeks = response["game"]["game_weeks"]
-        game_weeks[self.league_start_week - 1][
-            "start"
-        ] = self.league_start_date_str  # Should it be -1 or -league_start_week?
-        game_weeks[self.league_end_week - 1]["end"] = self.league_end_date_str
+        # Copy, the cached response is shared
+        game_weeks = list(response["game"]["game_weeks"])
+        game_weeks[self.league_start_week - 1] = {
+            **game_weeks[self.league_start_week - 1],
+            "start": self.league_start_date_str,
+        }  # Should it be -1 or -league_start_week?
+        game_weeks[self.league_end_week - 1] = {
+            **game_weeks[self.league_end_week - 1],
+            "end": self.league_end_date_str,
+        }
         return game_weeks
 
-    def get_dates_by_week(
-        self, week
-    ):  # TODO: This shouldn't be making a request every time its called
-        start_date_str = self.game_weeks[week - 1]["start"]
-        end_date_str = self.game_weeks[week - 1]["end"]
-        start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-        end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-        dates = [
-            (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
-            for i in range((end_date - start_date).days + 1)
-        ]
-        return dates
+    def build_indexes(self):
+        """
+        Builds the lookups metrics hit in their inner loops once, the league data never changes after Query.create
+        """
+        # {[team_key: str]: team}
+        self.teams_by_key = MappingProxyType(
+            {team["team_key"]: team for team in self.teams}
+        )
+        # {[team_key: str]: int} row of the team in teams x days arrays, standings order
+        self.team_index = MappingProxyType(
+            {team["team_key"]: i for i, team in enumerate(self.teams)}
+        )
+
+        opp_team_by_week = {}  # {[(team_key: str, week: int)]: str}
+        for matchup in self.matchups:
+            team_a, team_b = matchup.teams
+            opp_team_by_week[(team_a.team_key, matchup.week)] = team_b.team_key
+            opp_team_by_week[(team_b.team_key, matchup.week)] = team_a.team_key
+        self.opp_team_by_week = MappingProxyType(opp_team_by_week)
+
+        dates_by_week = {}  # {[week: int]: (date: str, ...)}
+        for week, game_week in enumerate(self.game_weeks, start=1):
+            start_date = datetime.strptime(game_week["start"], "%Y-%m-%d")
+            end_date = datetime.strptime(game_week["end"], "%Y-%m-%d")
+            dates_by_week[week] = tuple(
+                (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
+                for i in range((end_date - start_date).days + 1)
+            )
+        self.dates_by_week = MappingProxyType(dates_by_week)
+
+    def get_dates_by_week(self, week):
+        return self.dates_by_week[week]
 
     def get_teams(self):
         """
@@ -122,57 +435,68 @@ class Query:
         return teams_dict
 
     def get_team_name_from_key(self, team_key):
-        team_name = next(
-            team["name"] for team in self.teams if team["team_key"] == team_key
-        )
-        return team_name
+        return self.teams_by_key[team_key]["name"]
 
     async def get_players(self, player_keys):
         """
-        Returns a list of players with their details and stats for the season
+        Returns a list of PlayerStats with their details and stats for the season
         """
-        return [
-            player
-            for i in range(int(len(player_keys) / 25) + 1)
-            for player in (
-                await self.get_response(
-                    f"/league/{self.league_key}/players;player_keys={','.join(player_keys[i*25:min((i+1)*25, len(player_keys))])};start={i*25}/stats"
-                )
-            )["league"]["players"]
+        urls = [
+            f"/league/{self.league_key}/players;player_keys={','.join(player_keys[i:i+25])};start={i}/stats"
+            for i in range(0, len(player_keys), 25)
         ]
+        responses = await self.get_responses(urls, PlayerStatsExtractor)
+        return [player for players in responses for player in players]
 
     async def get_top_n_players_by_position(self, n, position):
         if position == "F":
             position = "C,LW,RW"
-        return [
-            player
+        urls = [
+            f"/league/{self.league_key}/players;sort=PTS;sort_type=season;position={position};count={n};start={i*25}/stats"
             for i in range(int(n / 25) + 1)
-            for player in (
-                await self.get_response(
-                    f"/league/{self.league_key}/players;sort=PTS;sort_type=season;position={position};count={n};start={i*25}/stats"
-                )
-            )["league"]["players"]
         ]
+        responses = await self.get_responses(urls, PlayerStatsExtractor)
+        return [player for players in responses for player in players]
 
-    def get_player_game_log_nhl(self, player_id):
+    async def get_nhl_response(self, url):
+        async with self.nhl_semaphore:
+            async with self.session.get(url) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+    async def get_player_game_log_nhl(self, player_id):
+        """
+        Game logs of finished seasons don't change, so they're kept on disk and survive restarts
+        """
         season = f"{self.league_season}{self.league_season+1}"
-        return requests.get(
+        path = os.path.join(NHL_GAME_LOG_CACHE_DIR, season, f"{player_id}.json")
+        player_game_log = await asyncio.to_thread(read_json_file, path)
+        if player_game_log is not None:
+            return player_game_log
+        response = await self.get_nhl_response(
             f"https://api-web.nhle.com/v1/player/{player_id}/game-log/{season}/2"
-        ).json()[
-            "gameLog"
-        ]  # 2 inndicates regular season games
+        )  # 2 inndicates regular season games
+        player_game_log = response["gameLog"]
+        if self.league_is_finished:
+            await asyncio.to_thread(write_json_file, path, player_game_log)
+        return player_game_log
+
+    async def get_game_log_by_player(self, player_key, player_name, player_position):
+        return await self.single_flight(
+            self.game_logs_cache,
+            player_key,
+            lambda: self.fetch_game_log_by_player(player_name, player_position),
+        )
 
-    def get_game_log_by_player(self, player_key, player_name, player_position):
-        if player_key in self.game_logs_cache:
-            return self.game_logs_cache[player_key]
+    async def fetch_game_log_by_player(self, player_name, player_position):
         player_name_url = player_name.replace(" ", "%20").replace("-", "%20")
-        players_resp = requests.get(
+        players_resp = await self.get_nhl_response(
             f"https://search.d3.nhle.com/api/v1/search/player?culture=en-us&limit=20&q={player_name_url}%2A"
-        ).json()
+        )
         players = [
             player
             for player in players_resp
-            if self.normalize_name(player["name"]) == player_name
+            if normalize_name(player["name"]) == player_name
         ]  # Matching names
         # If there are multiple players matching name, filter by other attributes
         if len(players) > 1:
@@ -192,9 +516,7 @@ class Query:
             print(len(players), player_name, players)
         player = players[0]
         player_id = player["playerId"]
-        player_game_log = self.get_player_game_log_nhl(player_id)
-        self.game_logs_cache[player_key] = player_game_log
-        return player_game_log
+        return await self.get_player_game_log_nhl(player_id)
 
     def get_player_team_on_date(self, player_game_log, date):
         game = next(
@@ -222,247 +544,221 @@ class Query:
             ]
         )
         url = f"/league/{self.league_key}/scoreboard;week={weeks}"
-        response = await self.get_response(url)
-        return response["league"]["scoreboard"]["matchups"]
+        return await self.get_response(url, ScoreboardExtractor)
 
     def get_opp_team_by_week(self, team_key, week):
-        # TODO make this a dict to improve performance so don't have to search through list every time
-        opp_key = [
-            (
-                matchup["teams"][0]["team_key"]
-                if matchup["teams"][0]["team_key"] != team_key
-                else matchup["teams"][1]["team_key"]
-            )
-            for matchup in self.matchups
-            if int(matchup["week"]) == week
-            and team_key in [team["team_key"] for team in matchup["teams"]]
-        ]
-        return opp_key[0] if len(opp_key) else None
-
-    async def get_all_teams_daily_stats(self):
-        start_date = datetime.strptime(self.league_start_date_str, "%Y-%m-%d")
-        end_date = datetime.strptime(self.league_end_date_str, "%Y-%m-%d")
-        dates = [
-            (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
-            for i in range((end_date - start_date).days + 1)
-        ]
+        return self.opp_team_by_week.get((team_key, week))
+
+    async def get_team_daily_points_window(self, week, dates):
         url = f"/league/{self.league_key}/teams/stats_collection;types=date;date={','.join(dates)}"
-        response = await self.get_response(url)
-        all_teams_daily_stats = response["league"]["teams"]
-        all_teams_daily_stats_dict = {
-            team["team_key"]: {
-                team_points["date"]: float(team_points["total"])
-                for team_points in team["team_stats_collection"]["team_points"]
-            }
-            for team in all_teams_daily_stats
-        }  # Preprocess into dict for constant time lookup {[team_key: str]: {[date: str]: float}}
-        return all_teams_daily_stats_dict
+        teams = await self.get_response(url, DailyPointsExtractor)
+        points = np.zeros((len(self.team_index), len(dates)))
+        for team in teams:
+            points[self.team_index[team.key]] = [
+                team.points_by_date.get(date, 0.0) for date in dates
+            ]
+        return week, dates, points
 
-    async def get_players_points_by_date(self, player_keys, dates):
-        points_by_player = defaultdict(
-            lambda: {"name": None, "image_url": None, "points": 0}
-        )
+    async def iter_team_daily_points(self, dates_by_week):
+        """
+        Fetches the season's daily team points in week sized windows, all weeks concurrently, rather than one
+        season long response that has to be downloaded and parsed before any work can start
+        dates_by_week: {[week: int]: (date: str, ...)} days of each window
+        Yields:
+            (week: int, dates: (str, ...), points: np.ndarray) as each week arrives, points is teams x dates with
+            rows in team_index order
+        """
+        windows = [
+            self.get_team_daily_points_window(week, dates)
+            for week, dates in dates_by_week.items()
+            if dates
+        ]
+        for window in asyncio.as_completed(windows):
+            yield await window
+
+    async def get_league_rosters_window(self, week):
+        url = f"/league/{self.league_key}/teams/roster;week={week}/players/stats;type=week;week={week}"
+        return week, await self.get_response(url, PlayerStatsExtractor)
+
+    async def iter_league_rosters(self):
+        """
+        Fetches every team's roster and weekly player stats with one league wide request per week, all weeks
+        concurrently, instead of one request per team per week
+        Yields:
+            (week: int, players: [PlayerStats]) as each week arrives, player.team_key is the team they were rostered
+            on, weeks without any matchup are skipped
+        """
+        weeks = sorted({week for _, week in self.opp_team_by_week})
+        windows = [self.get_league_rosters_window(week) for week in weeks]
+        for window in asyncio.as_completed(windows):
+            yield await window
+
+    async def get_players_daily_points(self, player_keys, dates):
+        """
+        Fetches every player's points on each of dates in one pass, 25 players per request and all requests in parallel
+        Returns:
+            (players: {[player_key: str]: DailyPoints}, points: np.ndarray) points is players x dates with rows in
+            player_keys order, players Yahoo didn't return are left at 0
+        """
         dates_csv = ",".join(dates)
-        for i in range(0, len(player_keys), 25):
-            player_keys_csv = ",".join(player_keys[i : min(i + 25, len(player_keys))])
-            url = f"/league/{self.league_key}/players;player_keys={player_keys_csv}/stats_collection;types=date;date={dates_csv}"
-            response = await self.get_response(url)
-            players_stats_for_dates = response["league"]["players"]
-            for player in players_stats_for_dates:
-                if player["player_key"] not in points_by_player:
-                    points_by_player[player["player_key"]]["name"] = player["name"][
-                        "full"
-                    ]
-                    points_by_player[player["player_key"]]["image_url"] = player[
-                        "image_url"
-                    ]
-                points_by_player[player["player_key"]]["points"] = round(
-                    points_by_player[player["player_key"]]["points"]
-                    + float(
-                        sum(
-                            float(player_points_date["total"])
-                            for player_points_date in player["player_stats_collection"][
-                                "player_points"
-                            ]
-                        )
-                    ),
-                    1,
-                )
-        return points_by_player
+        urls = [
+            f"/league/{self.league_key}/players;player_keys={','.join(player_keys[i : i + 25])}/stats_collection;types=date;date={dates_csv}"
+            for i in range(0, len(player_keys), 25)
+        ]
+        responses = await self.get_responses(urls, DailyPointsExtractor)
+        players = {player.key: player for batch in responses for player in batch}
+        points = np.zeros((len(player_keys), len(dates)))
+        for row, player_key in enumerate(player_keys):
+            if player_key in players:
+                points_by_date = players[player_key].points_by_date
+                points[row] = [points_by_date.get(date, 0.0) for date in dates]
+        return players, points
 
     async def get_league_matchup_results_by_week(self, weeks: list[int]):
         weeks = ",".join(str(week) for week in weeks)
         url = f"/league/{self.league_key}/scoreboard;week={weeks}"
-        response = await self.get_response(url)
-        return response["league"]["scoreboard"]["matchups"]
+        return await self.get_response(url, ScoreboardExtractor)
 
     async def get_matchup_data(self):
-        weekly_matchup_data = self.scoreboard
         completed_matchups_data = []
-        winning_team = 0
-        losing_team = 1
-        for matchup_num in range(len(weekly_matchup_data)):
-            point_diff = round(
-                float(
-                    weekly_matchup_data[matchup_num]["teams"][0]["team_points"]["total"]
-                )
-                - float(
-                    weekly_matchup_data[matchup_num]["teams"][1]["team_points"]["total"]
-                ),
-                2,
-            )
+        for matchup in self.scoreboard:
+            point_diff = round(matchup.teams[0].points - matchup.teams[1].points, 2)
             if point_diff < 0:
-                winning_team = 1
-                losing_team = 0
+                winning_team, losing_team = matchup.teams[1], matchup.teams[0]
             else:
-                winning_team = 0
-                losing_team = 1
+                winning_team, losing_team = matchup.teams[0], matchup.teams[1]
             completed_matchups_data.append(
                 {
-                    "team1_key": weekly_matchup_data[matchup_num]["teams"][
-                        winning_team
-                    ]["team_key"],
-                    "team1_name": weekly_matchup_data[matchup_num]["teams"][
-                        winning_team
-                    ]["name"],
-                    "team1_points": float(
-                        weekly_matchup_data[matchup_num]["teams"][winning_team][
-                            "team_points"
-                        ]["total"]
-                    ),
-                    "team1_url": weekly_matchup_data[matchup_num]["teams"][
-                        winning_team
-                    ]["team_logos"]["team_logo"]["url"],
-                    "team2_key": weekly_matchup_data[matchup_num]["teams"][losing_team][
-                        "team_key"
-                    ],
-                    "team2_name": weekly_matchup_data[matchup_num]["teams"][
-                        losing_team
-                    ]["name"],
-                    "team2_points": float(
-                        weekly_matchup_data[matchup_num]["teams"][losing_team][
-                            "team_points"
-                        ]["total"]
-                    ),
-                    "team2_url": weekly_matchup_data[matchup_num]["teams"][losing_team][
-                        "team_logos"
-                    ]["team_logo"]["url"],
+                    "team1_key": winning_team.team_key,
+                    "team1_name": winning_team.name,
+                    "team1_points": winning_team.points,
+                    "team1_url": winning_team.logo_url,
+                    "team2_key": losing_team.team_key,
+                    "team2_name": losing_team.name,
+                    "team2_points": losing_team.points,
+                    "team2_url": losing_team.logo_url,
                     "point_diff": abs(point_diff),
-                    "is_tied": int(weekly_matchup_data[matchup_num]["is_tied"]),
-                    "week": int(weekly_matchup_data[matchup_num]["week"]),
-                    "is_playoffs": int(weekly_matchup_data[matchup_num]["is_playoffs"]),
-                    "is_consolation": int(
-                        weekly_matchup_data[matchup_num]["is_consolation"]
-                    ),
+                    "is_tied": matchup.is_tied,
+                    "week": matchup.week,
+                    "is_playoffs": matchup.is_playoffs,
+                    "is_consolation": matchup.is_consolation,
                 }
             )
         return completed_matchups_data
 
-    async def cleanup(self):
-        await self.session.close()
+    async def run_metric(self, metrics, name):
+        # Runs in its own task so this only applies to the metric's requests
+        request_priority.set(METRICS.index(name))
+        # A failing metric returns None rather than raising so the rest of the wrapped is still served and cached
+        try:
+            with metric_span(name, self.league_key):
+                # Waits for the datasets the metric reads, which every other metric reading them shares
+                await asyncio.gather(
+                    *(self.get_dataset(dataset) for dataset in METRIC_DATASETS[name])
+                )
+                return name, await getattr(metrics, name)()
+        except Exception as e:
+            print(f"{name} failed: {e!r}")
+            return name, None
 
-    async def get_metrics(self):
+    async def get_metrics(
+        self,
+        cached_results=MappingProxyType({}),
+        pace=0.1,
+        on_metric=None,
+        max_wait=MAX_HEAD_OF_LINE_WAIT,
+    ):
+        """
+        Yields the json of every slide of METRICS in METRICS_META order. Metrics in cached_results
+        ({[name: str]: [json: str]}) aren't computed, their json is yielded in its place ([] for json the caller already
+        sent). The others run concurrently and each metric's results are persisted to doc_ref["results"][name] as soon
+        as it completes, so a client disconnect or a failing metric doesn't throw away the metrics that already finished.
+        A completed metric waits at most max_wait seconds for the slides before it, then it's yielded out of order with
+        a "position" (index in METRICS_META) for the UI to slot it in. None always waits.
+        Results of the same metric are spaced out by pace seconds, 0 yields them back to back.
+        on_metric(name) is called as each metric finishes, whether or not it produced results.
+        """
         metrics = Metrics(self)
-        tasks = [
-            metrics.get_standings(),
-            metrics.get_alternative_realities(),
-            metrics.get_draft_busts_steals(),
-            metrics.get_team_season_data(),
-            metrics.get_biggest_comebacks(),
-            metrics.get_worst_drops(),
-            # metrics.get_most_dropped_players(),
-            # metrics.get_best_worst_drafts(),
-            # metrics.get_closest_matchups(),
-            # metrics.get_biggest_blowout_matchups(),
-            # metrics.get_rivalry_dominance(),
-        ]
-        metrics_meta = {
-            "official_standings": {
-                "title": '"Official" Results',
-                "description": "Sure, these are the official results. But were they really the best team? The luckiest? The biggest flop? Keep scrolling to uncover the real winners and losers of the season.",
-                "type": "list",
-            },
-            "alternative_realities": {
-                "title": "Alternative Realities",
-                "description": "What if your team had a different schedule? This matrix reimagines the season by swapping team schedules, showing how records would have changed in an alternate universe. Did bad luck hold you back, or were you truly dominant no matter the matchups?",
-                "type": "table",
-            },
-            "draft_steals": {
-                "title": "Draft Steal",
-                "description": "Some picks turn out to be absolute gems! This metric highlights the player who delivered the biggest return on investment, massively outperforming their draft position. Whether it was a late-round sleeper who dominated or a mid-round pick who played like a first-rounder, this is your league's ultimate steal of the draft.",
-                "type": "list",
-            },
-            "draft_busts": {
-                "title": "Draft Bust",
-                "description": "Not all picks live up to the hype. This metric identifies the player who fell the hardest from expectations, drastically underperforming their draft position. Whether it was due to injuries, poor form, or just bad luck, this was the pick that stung the most for fantasy managers.",
-                "type": "list",
-            },
-            "one_man_army": {
-                "title": "One-Man Army",
-                "description": "This metric highlights the player who carried the biggest scoring burden for their team by contributing the highest percentage of their team’s total points. It showcases which players were the most crucial to their team’s success, whether due to elite performance or a lack of supporting cast. A high percentage means this player was the go-to option, shouldering most of the team’s fantasy production.",
-                "type": "list",
-            },
-            "team_tormentor": {
-                "title": "Team Tormentor",
-                "description": "This metric identifies the player who scored the most total points against a single team, revealing their toughest matchup.",
-                "type": "list",
-            },
-            "biggest_comeback": {
-                "title": "Greatest Comebacks",
-                "description": "The most impressive turnarounds of the season! This stat highlights the teams that overcame the largest point deficits to secure a victory in a single week, proving that no lead is ever safe.",
-                "type": "list",
-            },
-            "the_one_that_got_away": {
-                "title": "The One That Got Away",
-                "description": 'These players were the ultimate "what could have been" stories of the season. After being dropped, they went on to rack up the most points—leaving their former managers with major regret.',
-                "type": "list",
-            },
-            "most_dropped": {
-                "title": "Hot Potato",
-                "description": "These players just couldn’t find a permanent home! This metric highlights the most frequently added and dropped players of the season, showing which names cycled through the league the most.",
-                "type": "list",
-            },
-            "best_drafts": {
-                "title": "Draft Guru",
-                "description": "Some managers are elite scouts and have a keen eye for talent! Let's take a look at who had the best drafts in your league (let's just hope they didn't drop their drafted players)",
-                "type": "list",
-            },
-            "worst_drafts": {
-                "title": "Bench Builder",
-                "description": "Now lets take a look at the managers who really laid an egg on draft day (maybe do some research next time)",
-                "type": "list",
-            }, 
-            "closest_matchups": {
-                "title": "A Win is a Win",
-                "description": "There were some real barn burner matchups this year! Here is a look at this year's closest weekly matchups.",
-                "type": "list",
-            },
-            "biggest_blowouts": {
-                "title": "Biggest Blowouts",
-                "description": "Now looking at the opposite of barn burners, let's take a look at who got boat raced this year.",
-                "type": "list",
-            },
-            "rivalry_dominance": {
-                "title": "Pure Dominance",
-                "description": "Think Canada Hockey vs USA Hockey, Pakcers vs Bears, or Globetrotters vs Generals. Some teams never stood a chance against their rival. Take a look at these matchups with one team completely dominating the other (don't forget to give your friend a hard time for this one).",
-                "type": "list",
-            },
+        running = {
+            asyncio.ensure_future(self.run_metric(metrics, name))
+            for name in METRICS
+            if name not in cached_results
+        }
+        tasks = list(running)
+        # {[name: str]: [json: str]} completed metrics that weren't yielded yet
+        ready = {
+            name: cached_results[name] for name in METRICS if name in cached_results
         }
-        all_metrics = []
-        for task in asyncio.as_completed(tasks):  # Yields tasks as they are completed
-            results = await task  # Expects each task to return an array
-            for i, result in enumerate(results):
-                if i != 0:
-                    await asyncio.sleep(0.1)
-                resp_val = metrics_meta[result["id"]]
-                resp_val["data"] = result["data"]
-                if "headers" in result:  # For alternative realities
-                    resp_val["headers"] = result["headers"]
-                json_resp_val = json.dumps(
-                    [resp_val]
-                )  # StreamingResponse expects iterable of bytes or strings
-                all_metrics.append(json_resp_val)
-                yield (json_resp_val)
+        pending = list(METRICS)  # Metrics that weren't yielded yet, in display order
+        head_since = time.perf_counter()  # When pending[0] got to the front of the line
+        try:
+            while pending:
+                if pending[0] in ready:
+                    names = [pending.pop(0)]
+                    out_of_order = False
+                    head_since = time.perf_counter()
+                elif (
+                    ready
+                    and max_wait is not None
+                    and time.perf_counter() - head_since >= max_wait
+                ):
+                    # Don't hold back the slides that are done any longer
+                    names = [name for name in pending if name in ready]
+                    pending = [name for name in pending if name not in ready]
+                    out_of_order = True
+                else:
+                    timeout = None
+                    if ready and max_wait is not None:
+                        timeout = max_wait - (time.perf_counter() - head_since)
+                    done, running = await asyncio.wait(
+                        running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        name, results = task.result()
+                        if on_metric:
+                            on_metric(name)
+                        ready[name] = await self.save_results(name, results)
+                    continue
+                for name in names:
+                    for i, json_resp_val in enumerate(ready.pop(name)):
+                        if i != 0 and pace:
+                            await asyncio.sleep(pace)
+                        if out_of_order:
+                            json_resp_val = add_position(json_resp_val)
+                        yield json_resp_val
+        finally:
+            # Stops the metrics still running if the consumer stopped early, e.g. its job was cancelled
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def save_results(self, name, results):
+        """
+        Persists the results of metric name to doc_ref["results"][name]
+        Returns:
+            [json: str] one per slide in METRICS_META order, [] when the metric failed
+        """
+        if results is None:
+            return []
+        json_resp_vals = []
+        for result in sorted(results, key=lambda result: SLIDE_POSITIONS[result["id"]]):
+            resp_val = dict(METRICS_META[result["id"]])
+            resp_val["data"] = result["data"]
+            if "headers" in result:  # For alternative realities
+                resp_val["headers"] = result["headers"]
+            json_resp_vals.append(
+                json.dumps([resp_val])
+            )  # StreamingResponse expects iterable of bytes or strings
         if self.doc_ref:
-            self.doc_ref.set({"metrics": all_metrics})
-        await self.cleanup()
+            await self.doc_ref.set({"results": {name: json_resp_vals}}, merge=True)
+        return json_resp_vals
+
+
+def add_position(json_resp_val):
+    """
+    Returns:
+        str: json_resp_val with the slide's index in METRICS_META added
+    """
+    [resp_val] = json.loads(json_resp_val)
+    resp_val["position"] = SLIDE_POSITIONS_BY_TITLE[resp_val["title"]]
+    return json.dumps([resp_val])
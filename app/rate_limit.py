@@ -0,0 +1,194 @@
+import os
+import heapq
+import itertools
+import random
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from weakref import WeakValueDictionary
+
+# Yahoo doesn't publish its limits, these start generous and back off when it answers 999/429
+APP_RATE = float(os.getenv("YAHOO_APP_RATE", 500))  # Requests/s per consumer key
+APP_BURST = int(os.getenv("YAHOO_APP_BURST", 1000))
+USER_RATE = float(os.getenv("YAHOO_USER_RATE", 100))  # Requests/s per user token
+USER_BURST = int(os.getenv("YAHOO_USER_BURST", 200))
+MIN_RATE = 1.0  # Floor the adaptive rate is never throttled below
+RATE_INCREASE = 0.5  # Requests/s regained per successful request
+THROTTLE_WINDOW = (
+    1.0  # Seconds, throttles within a window of the last one are the same burst
+)
+
+THROTTLE_STATUSES = {429, 999}
+RETRY_STATUSES = THROTTLE_STATUSES | {500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.25  # Seconds, doubled every attempt
+BACKOFF_MAX = 8.0
+
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive requests that exhausted their retries
+CIRCUIT_COOLDOWN = 30.0  # Seconds the circuit stays open before letting a probe through
+
+
+class YahooUnavailableError(Exception):
+    """
+    Raised instead of sending a request while the circuit breaker is open
+    """
+
+
+class TokenBucket:
+    """
+    Token bucket that paces callers rather than rejecting them. The rate adapts AIMD style: halved when Yahoo
+    throttles (once per THROTTLE_WINDOW, a burst of concurrent 999s is one signal), regained linearly with successes.
+    """
+
+    def __init__(self, rate, capacity):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.throttled_at = None
+
+    async def acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # Reserve the token up front so concurrent callers queue up behind each other without a lock
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+    def throttled(self):
+        now = time.monotonic()
+        if self.throttled_at is not None and now - self.throttled_at < THROTTLE_WINDOW:
+            return
+        self.throttled_at = now
+        self.rate = max(self.rate / 2, MIN_RATE)
+        self.tokens = min(self.tokens, 0)
+
+    def succeeded(self):
+        self.rate = min(self.rate + RATE_INCREASE, self.max_rate)
+
+
+class CircuitBreaker:
+    """
+    Opens after CIRCUIT_FAILURE_THRESHOLD consecutive requests failed every retry, so requests fail fast instead of
+    piling onto a Yahoo that is throttling or down. After CIRCUIT_COOLDOWN a single probe is let through, its success closes the circuit.
+    """
+
+    def __init__(
+        self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def check(self):
+        """
+        Called once per request, not per attempt
+        Returns:
+            bool: True when the circuit is half open and the caller is the probe, it must call end_probe once done
+        """
+        if self.opened_at is None:
+            return False
+        if self.probing or time.monotonic() - self.opened_at < self.cooldown:
+            raise YahooUnavailableError("Yahoo circuit breaker is open")
+        self.probing = True  # Half open, this caller is the probe
+        return True
+
+    def end_probe(self):
+        # A probe that ended without success or failure (cancelled, non-retryable status) lets the next request probe
+        self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or (
+            self.opened_at is None and self.failures >= self.failure_threshold
+        ):
+            print(f"Opening Yahoo circuit breaker after {self.failures} failures")
+            self.opened_at = time.monotonic()
+            self.probing = False
+
+
+class PrioritySemaphore:
+    """
+    Semaphore that hands a freed slot to the waiter with the lowest priority rather than the one that waited longest,
+    waiters with the same priority are served in arrival order
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self.waiters = []  # heap of (priority, arrival, asyncio.Future)
+        self.arrivals = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, priority=0):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority=0):
+        if self.value > 0 and not self.waiters:
+            self.value -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.arrivals), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # Cancelled right after being handed the slot, pass it on
+            raise
+
+    def release(self):
+        while self.waiters:
+            _, _, waiter = heapq.heappop(self.waiters)
+            if not waiter.done():  # Cancelled waiters are skipped
+                waiter.set_result(None)
+                return
+        self.value += 1
+
+
+# Shared by every Query in the process, user buckets go away with the last Query using them
+app_limiters = {}  # {[consumer_key: str]: TokenBucket}
+user_limiters = WeakValueDictionary()  # {[token: str]: TokenBucket}
+circuit_breakers = {}  # {[consumer_key: str]: CircuitBreaker}
+
+
+def get_app_limiter(consumer_key):
+    if consumer_key not in app_limiters:
+        app_limiters[consumer_key] = TokenBucket(APP_RATE, APP_BURST)
+    return app_limiters[consumer_key]
+
+
+def get_user_limiter(token):
+    limiter = user_limiters.get(token)
+    if limiter is None:
+        limiter = user_limiters[token] = TokenBucket(USER_RATE, USER_BURST)
+    return limiter
+
+
+def get_circuit_breaker(consumer_key):
+    if consumer_key not in circuit_breakers:
+        circuit_breakers[consumer_key] = CircuitBreaker()
+    return circuit_breakers[consumer_key]
+
+
+def get_backoff(attempt, retry_after=None):
+    """
+    retry_after is the raw Retry-After header, only the delay in seconds form is honored
+    Returns:
+        float: seconds to wait before retry number attempt + 1, full jitter exponential backoff
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(float(retry_after), BACKOFF_MAX))
+    return delay
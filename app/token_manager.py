@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+TOKEN_LIFETIME = 3600  # Seconds a Yahoo access token is valid for
+EXPIRY_MARGIN = 60  # Refresh this many seconds before Yahoo would reject the token
+
+
+class TokenManager:
+    """
+    Process wide cache of Yahoo access tokens keyed by refresh token, shared by every Query for the same user.
+    The bearer token a client sends is used as is until Yahoo rejects it, refreshes then run in a thread (yahoo_oauth
+    uses blocking requests) and concurrent refreshes of the same refresh token share a single call.
+    """
+
+    def __init__(self):
+        # {[refresh_token: str]: (access_token: str, expires_at: float)}
+        self.access_tokens = {}
+        self.refreshes = {}  # {[refresh_token: str]: asyncio.Task}
+
+    def get_access_token(self, oauth):
+        """
+        Returns:
+            str: the token this process last refreshed for oauth's refresh token while it's still valid, otherwise
+            the one oauth was created with
+        """
+        cached = self.access_tokens.get(oauth.refresh_token)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        return oauth.access_token
+
+    async def refresh(self, oauth, stale_access_token):
+        """
+        Refreshes oauth's access token unless another caller already replaced stale_access_token
+        Returns:
+            str: access token
+        """
+        refresh_token = oauth.refresh_token
+        access_token = self.get_access_token(oauth)
+        if access_token != stale_access_token:
+            return access_token
+        task = self.refreshes.get(refresh_token)
+        if task is None:
+            task = asyncio.ensure_future(self.run_refresh(oauth, refresh_token))
+            task.add_done_callback(lambda _: self.refreshes.pop(refresh_token, None))
+            self.refreshes[refresh_token] = task
+        return await asyncio.shield(task)
+
+    async def run_refresh(self, oauth, refresh_token):
+        print("Refreshing Yahoo access token")
+        await asyncio.to_thread(oauth.refresh_access_token)
+        now = time.monotonic()
+        self.access_tokens = {
+            key: cached for key, cached in self.access_tokens.items() if cached[1] > now
+        }
+        self.access_tokens[refresh_token] = (
+            oauth.access_token,
+            now + TOKEN_LIFETIME - EXPIRY_MARGIN,
+        )
+        return oauth.access_token
+
+
+token_manager = TokenManager()
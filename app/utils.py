@@ -1,56 +1,100 @@
 import xml.etree.ElementTree as ET
 import unicodedata
+import json
+import os
+import sys
+import tempfile
 
 
-def xml_to_dict(xml_string):
-    # print(xml_string)
-
-    def strip_namespace(tag):
-        """Remove namespace from the tag name."""
-        return tag.split("}")[-1] if "}" in tag else tag
-
-    def parse_element(element):
-        parsed_data = {}
-        children = list(element)
-
-        # Check if all children have the same tag (implying a list)
-        child_tags = [strip_namespace(child.tag) for child in children]
-        list_tags = ["players"]  # TODO: find more list tags
-        is_list = (
-            strip_namespace(element.tag) in list_tags
-            or len(set(child_tags)) == 1
-            and len(children) > 1
-        )
-
-        # Convert child elements into dictionary keys
-        if is_list:
-            return [
-                parse_element(child) for child in children
-            ]  # Return a list directly
+LIST_TAGS = {"players"}  # Always decoded as lists TODO: find more list tags
+SINGLE_ITEM_LIST_TAGS = {"player_points", "player_stats"}  # Always wrapped in a list
+LOCAL_NAMES = {}  # {[tag: str]: str} namespace stripped tag names, responses only use a handful of tags
+
+
+def strip_namespace(tag):
+    """Remove namespace from the tag name."""
+    name = LOCAL_NAMES.get(tag)
+    if name is None:
+        name = sys.intern(tag.split("}")[-1] if "}" in tag else tag)
+        LOCAL_NAMES[tag] = name
+    return name
+
+
+def decode_element(tag, children, text):
+    """
+    children: [(tag, value)] of the already decoded child elements
+    """
+    # Check if all children have the same tag (implying a list)
+    is_list = tag in LIST_TAGS or (
+        len(children) > 1
+        and all(child_tag == children[0][0] for child_tag, _ in children)
+    )
+    if is_list:
+        return [
+            child_data for _, child_data in children
+        ]  # Return a list directly
+
+    # Convert child elements into dictionary keys
+    parsed_data = {}
+    for child_tag, child_data in children:
+        # Handle multiple children with the same tag by storing them as lists
+        if child_tag in parsed_data:
+            if not isinstance(parsed_data[child_tag], list):
+                parsed_data[child_tag] = [parsed_data[child_tag]]
+            parsed_data[child_tag].append(child_data)
+        elif child_tag in SINGLE_ITEM_LIST_TAGS:
+            parsed_data[child_tag] = [child_data]
         else:
-            for child in children:
-                tag = strip_namespace(child.tag)
-                child_data = parse_element(child)
+            parsed_data[child_tag] = child_data
+
+    # If the element has text content, add it
+    text = text.strip() if text else ""
+    if text and not parsed_data:
+        return text  # Return text if no nested structure
+
+    return parsed_data or text  # Return text if no nested structure
 
-                # Handle multiple children with the same tag by storing them as lists
-                if tag in parsed_data:
-                    if not isinstance(parsed_data[tag], list):
-                        parsed_data[tag] = [parsed_data[tag]]
-                    parsed_data[tag].append(child_data)
-                elif tag in ["player_points", "player_stats"]:
-                    parsed_data[tag] = [child_data]
-                else:
-                    parsed_data[tag] = child_data
 
-        # If the element has text content, add it
-        text = element.text.strip() if element.text else ""
-        if text and not parsed_data:
-            return text  # Return text if no nested structure
+class XmlDecoder:
+    """
+    Incrementally decodes a Yahoo XML response into nested dicts/lists.
+    Feed it the body in chunks as they are downloaded and call close() to get the decoded response.
+    Elements are decoded as soon as they end, so no full ElementTree is ever kept around.
+    """
 
-        return parsed_data or text  # Return text if no nested structure
+    def __init__(self):
+        self.parser = ET.XMLPullParser(events=("start", "end"))
+        self.open_elements = []  # [(tag, children)] from the root to the current element
+        self.result = None
 
-    root = ET.fromstring(xml_string)
-    return parse_element(root)
+    def feed(self, chunk):
+        self.parser.feed(chunk)
+        self.read_events()
+
+    def close(self):
+        self.parser.close()
+        self.read_events()
+        return self.result
+
+    def read_events(self):
+        open_elements = self.open_elements
+        for event, element in self.parser.read_events():
+            if event == "start":
+                open_elements.append((strip_namespace(element.tag), []))
+                continue
+            tag, children = open_elements.pop()
+            data = decode_element(tag, children, element.text)
+            element.clear()  # Already decoded, release the element's children
+            if open_elements:
+                open_elements[-1][1].append((tag, data))
+            else:
+                self.result = data
+
+
+def xml_to_dict(xml_string):
+    decoder = XmlDecoder()
+    decoder.feed(xml_string)
+    return decoder.close()
 
 
 def normalize_name(name):
@@ -58,3 +102,27 @@ def normalize_name(name):
     return "".join(
         c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c)
     )
+
+
+def read_json_file(path):
+    # Returns None if the file hasn't been written yet
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_json_file(path, data):
+    # Write to a temp file then rename so a crash never leaves a partially written file behind
+    # A unique temp name per call, concurrent writers of the same path can't clobber each other's temp file
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as f:
+        try:
+            json.dump(data, f)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    os.replace(f.name, path)
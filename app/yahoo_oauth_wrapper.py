@@ -6,18 +6,20 @@ from rauth import OAuth2Service
 load_dotenv()
 CLIENT_ID = os.getenv("YAHOO_CONSUMER_KEY")
 CLIENT_SECRET = os.getenv("YAHOO_CONSUMER_SECRET")
+# Point at a local stand-in (tests/yahoo_stand_in.py) to run offline
+LOGIN_URL = os.getenv("YAHOO_LOGIN_URL", "https://api.login.yahoo.com")
 
 oauth_service = {
     "SERVICE": OAuth2Service,
-    "AUTHORIZE_TOKEN_URL": "https://api.login.yahoo.com/oauth2/request_auth",
-    "ACCESS_TOKEN_URL": "https://api.login.yahoo.com/oauth2/get_token",
+    "AUTHORIZE_TOKEN_URL": f"{LOGIN_URL}/oauth2/request_auth",
+    "ACCESS_TOKEN_URL": f"{LOGIN_URL}/oauth2/get_token",
 }
 
 CALLBACK_URI = "oob"
 
 STORE_FILE_FLAG = True
 
-BASE_URL = "https://fantasysports.yahooapis.com/fantasy/v2"
+BASE_URL = os.getenv("YAHOO_BASE_URL", "https://fantasysports.yahooapis.com/fantasy/v2")
 
 
 class YahooOAuthWrapper(BaseOAuth):
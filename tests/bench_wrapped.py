@@ -0,0 +1,265 @@
+"""
+End-to-end benchmark of /wrapped/{league_key} against synthetic leagues served by the Yahoo stand-in.
+
+Each league size runs in its own process so peak RSS and the cold start aren't polluted by the previous run. A run
+drives the FastAPI app directly over ASGI with an in-memory Firestore, first with no document (cold, every metric is
+computed from Yahoo responses) and then again with the document the cold run wrote (warm, served from cache).
+
+    python tests/bench_wrapped.py --teams 8 12 16 20 --latency 0.1 --jitter 0.03
+    python tests/bench_wrapped.py --teams 12 --json > baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+ACCESS_TOKEN = "bench"
+REFRESH_TOKEN = "bench"
+
+
+class MemorySnapshot:
+    def __init__(self, data):
+        self.exists = data is not None
+        self.data = data
+
+    def to_dict(self):
+        return json.loads(json.dumps(self.data)) if self.exists else None
+
+
+class MemoryDocument:
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+
+    async def get(self):
+        return MemorySnapshot(self.store.get(self.key))
+
+    async def set(self, data, merge=False):
+        current = self.store.get(self.key) if merge else None
+        self.store[self.key] = merge_dicts(current or {}, data)
+
+
+class MemoryCollection:
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def document(self, document_id):
+        return MemoryDocument(self.store, (self.name, document_id))
+
+
+class MemoryFirestore:
+    """
+    Just enough of google.cloud.firestore.AsyncClient for main.py
+    """
+
+    def __init__(self):
+        self.store = {}  # {[(collection, document_id)]: dict}
+
+    def collection(self, name):
+        return MemoryCollection(self.store, name)
+
+
+def merge_dicts(current, data):
+    merged = dict(current)
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_dicts(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+async def stream_wrapped(app, league_key, stream):
+    """
+    Calls the endpoint like an ASGI server would, timestamping every chunk of the streamed body
+    Returns:
+        {"status", "first_byte", "first_event", "last_event", "events": [(seconds: float, title: str)]}
+    """
+    start = time.perf_counter()
+    result = {"status": None, "first_byte": None, "events": []}
+    done = asyncio.Event()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/wrapped/{league_key}",
+        "raw_path": f"/wrapped/{league_key}".encode(),
+        "query_string": f"stream={stream}".encode(),
+        "root_path": "",
+        "headers": [
+            (b"authorization", f"Bearer {ACCESS_TOKEN}".encode()),
+            (b"x-refresh-token", REFRESH_TOKEN.encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 80),
+        "app": app,
+    }
+
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()  # Stay connected until the whole body has been sent
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        now = time.perf_counter() - start
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            if body and result["first_byte"] is None:
+                result["first_byte"] = now
+            for line in body.decode().splitlines():
+                if line.startswith("["):
+                    for metric in json.loads(line):
+                        result["events"].append((now, metric["title"]))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    event_times = [seconds for seconds, _ in result["events"]]
+    result["first_event"] = min(event_times, default=None)
+    result["last_event"] = max(event_times, default=None)
+    result["total"] = time.perf_counter() - start
+    return result
+
+
+def run_league(args):
+    """
+    Benchmarks one league size in this process, must run before main/query are imported anywhere
+    Returns:
+        dict of cold and warm results
+    """
+    sys.path.insert(0, APP_DIR)
+    from synthetic_league import SyntheticLeague
+    from yahoo_stand_in import YahooStandIn
+
+    league = SyntheticLeague(num_teams=args.run, seed=args.seed)
+    stand_in = YahooStandIn(
+        resolve=league.resolve,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        check_tokens=True,  # The bench token has to be refreshed like an expired one
+        seed=args.seed,
+    )
+    stop, login_url, base_url = stand_in.start_in_thread()
+    os.environ["YAHOO_BASE_URL"] = base_url
+    os.environ["YAHOO_LOGIN_URL"] = login_url
+
+    import main
+    from http_session import close_session
+    from jobs import JobStore, jobs
+
+    async def stream_and_close(*args):
+        # What the app lifespan does, every asyncio.run is a new loop
+        await jobs.start(main.run_wrapped, JobStore(":memory:"))
+        result = await stream_wrapped(*args)
+        await jobs.stop()
+        await close_session()
+        return result
+
+    main.app.state.db = MemoryFirestore()
+    results = {"teams": args.run}
+    for path in ("cold", "warm"):
+        stand_in.reset_counts()
+        logs = io.StringIO()  # The app logs with print, keep the report readable
+        with contextlib.redirect_stdout(logs):
+            result = asyncio.run(
+                stream_and_close(main.app, league.league_key, args.stream)
+            )
+        result["requests"] = stand_in.num_requests
+        result["rate_limited"] = stand_in.num_rate_limited
+        result["token_refreshes"] = stand_in.num_token_refreshes
+        result["peak_rss_mb"] = (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        )
+        results[path] = result
+    stop()
+    return results
+
+
+def format_seconds(seconds):
+    return "-" if seconds is None else f"{seconds:.3f}"
+
+
+def print_report(all_results):
+    print(
+        f"{'teams':>5} {'path':>5} {'status':>6} {'first byte':>10} {'first event':>11} {'last event':>10} "
+        f"{'events':>6} {'requests':>8} {'limited':>7} {'refreshes':>9} {'peak rss':>8}"
+    )
+    for results in all_results:
+        for path in ("cold", "warm"):
+            result = results[path]
+            print(
+                f"{results['teams']:>5} {path:>5} {result['status']:>6} {format_seconds(result['first_byte']):>10} "
+                f"{format_seconds(result['first_event']):>11} {format_seconds(result['last_event']):>10} "
+                f"{len(result['events']):>6} {result['requests']:>8} {result['rate_limited']:>7} {result['token_refreshes']:>9} "
+                f"{result['peak_rss_mb']:>6.1f}MB"
+            )
+    print("\nPer-metric latency (s, cold / warm)")
+    titles = list(dict.fromkeys(title for _, title in all_results[0]["cold"]["events"]))
+    print(f"{'metric':<24}" + "".join(f"{r['teams']:>16}" for r in all_results))
+    for title in titles:
+        row = f"{title[:23]:<24}"
+        for results in all_results:
+            cold, warm = (
+                dict((t, s) for s, t in results[path]["events"]).get(title)
+                for path in ("cold", "warm")
+            )
+            row += f"{format_seconds(cold) + ' / ' + format_seconds(warm):>16}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--teams", type=int, nargs="+", default=[8, 12, 16, 20])
+    parser.add_argument(
+        "--latency", type=float, default=0.1, help="seconds per Yahoo response"
+    )
+    parser.add_argument("--jitter", type=float, default=0.03, help="seconds")
+    parser.add_argument(
+        "--rate-limit", type=float, default=0.0, help="fraction of requests denied"
+    )
+    parser.add_argument("--stream", choices=("instant", "paced"), default="instant")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print raw results")
+    parser.add_argument("--run", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_league(args)))
+        return
+
+    all_results = []
+    for num_teams in args.teams:
+        command = [sys.executable, __file__, "--run", str(num_teams)]
+        for flag in ("latency", "jitter", "rate_limit", "stream", "seed"):
+            command += [f"--{flag.replace('_', '-')}", str(getattr(args, flag))]
+        output = subprocess.run(
+            command, check=True, capture_output=True, text=True
+        ).stdout
+        all_results.append(json.loads(output.strip().splitlines()[-1]))
+    if args.json:
+        print(json.dumps(all_results, indent=1))
+    else:
+        print_report(all_results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+import random
+import re
+from datetime import datetime, timedelta
+
+GAME_ID = 427
+SEASON = 2023
+SEASON_START = datetime(2023, 10, 10)
+HITS_STAT_ID = "31"
+
+
+class SyntheticLeague:
+    """
+    Deterministic fake Yahoo league that answers every endpoint Query calls.
+    Responses are returned as dicts in the same shape xml_to_dict produces, render them with yahoo_stand_in.dict_to_xml.
+    Every number is derived from a seeded RNG so the same league always produces the same wrapped.
+    """
+
+    def __init__(
+        self,
+        num_teams=12,
+        num_weeks=24,
+        playoff_weeks=3,
+        roster_size=14,
+        num_transactions=None,
+        seed=0,
+    ):
+        self.rng = random.Random(seed)
+        self.num_teams = num_teams
+        self.num_weeks = num_weeks
+        self.playoff_start_week = num_weeks - playoff_weeks + 1
+        self.league_id = 90000 + num_teams
+        self.league_key = f"{GAME_ID}.l.{self.league_id}"
+        self.team_keys = [f"{self.league_key}.t.{i + 1}" for i in range(num_teams)]
+        self.weeks = self.make_weeks()
+        self.dates = [
+            (SEASON_START + timedelta(days=i)).strftime("%Y-%m-%d")
+            for i in range((self.weeks[-1][2] - SEASON_START).days + 1)
+        ]
+        self.date_index = {date: i for i, date in enumerate(self.dates)}
+
+        # Player pool: every rostered player plus as many free agents again
+        num_players = num_teams * roster_size * 2
+        positions = ["C", "LW", "RW", "D", "D", "G"]
+        self.players = {}
+        for i in range(num_players):
+            player_key = f"{GAME_ID}.p.{1000 + i}"
+            self.players[player_key] = {
+                "position": positions[i % len(positions)],
+                "name": f"Player {1000 + i}",
+                "skill": self.rng.uniform(0.2, 3.0),
+            }
+        self.player_keys = list(self.players)
+        self.daily_points = {
+            player_key: [
+                (
+                    round(max(0, self.rng.gauss(player["skill"], 1.5)), 1)
+                    if self.rng.random() < 0.5
+                    else 0.0
+                )
+                for _ in self.dates
+            ]
+            for player_key, player in self.players.items()
+        }
+        self.rosters = {
+            team_key: self.player_keys[i * roster_size : (i + 1) * roster_size]
+            for i, team_key in enumerate(self.team_keys)
+        }
+        self.schedule = self.make_schedule()
+        self.transactions = self.make_transactions(
+            num_transactions if num_transactions is not None else num_teams * 10
+        )
+
+    def make_weeks(self):
+        weeks = []  # [(week, start, end)]
+        start = SEASON_START
+        for week in range(1, self.num_weeks + 1):
+            end = start + timedelta(days=6)
+            weeks.append((week, start, end))
+            start = end + timedelta(days=1)
+        return weeks
+
+    def make_schedule(self):
+        # Round robin, rotating every team but the first
+        teams = list(range(self.num_teams))
+        schedule = {}
+        for week, _, _ in self.weeks:
+            schedule[week] = [
+                (teams[i], teams[-1 - i]) for i in range(self.num_teams // 2)
+            ]
+            teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+        return schedule
+
+    def make_transactions(self, count):
+        # Newest first like Yahoo
+        transactions = []
+        free_agents = self.player_keys[
+            self.num_teams * len(self.rosters[self.team_keys[0]]) :
+        ]
+        for i in range(count):
+            day = self.rng.randrange(len(self.dates) - 1)
+            timestamp = int(
+                (
+                    datetime.strptime(self.dates[day], "%Y-%m-%d") + timedelta(hours=12)
+                ).timestamp()
+            )
+            team_key = self.rng.choice(self.team_keys)
+            add_key = self.rng.choice(free_agents)
+            drop_key = self.rng.choice(self.player_keys)
+            transactions.append(
+                {
+                    "transaction_key": f"{self.league_key}.tr.{i + 1}",
+                    "type": "add/drop",
+                    "status": "successful",
+                    "timestamp": str(timestamp),
+                    "players": [
+                        {
+                            "player_key": add_key,
+                            "name": {"full": self.players[add_key]["name"]},
+                            "transaction_data": {
+                                "type": "add",
+                                "source_type": "freeagents",
+                                "destination_type": "team",
+                                "destination_team_key": team_key,
+                            },
+                        },
+                        {
+                            "player_key": drop_key,
+                            "name": {"full": self.players[drop_key]["name"]},
+                            "transaction_data": {
+                                "type": "drop",
+                                "source_type": "team",
+                                "source_team_key": team_key,
+                                "destination_type": "waivers",
+                            },
+                        },
+                    ],
+                }
+            )
+        transactions.sort(key=lambda transaction: -int(transaction["timestamp"]))
+        return transactions
+
+    def week_date_indexes(self, week):
+        _, start, end = self.weeks[week - 1]
+        return range(
+            self.date_index[start.strftime("%Y-%m-%d")],
+            self.date_index[end.strftime("%Y-%m-%d")] + 1,
+        )
+
+    def player_points(self, player_key, date_indexes):
+        points = self.daily_points[player_key]
+        return round(sum(points[i] for i in date_indexes), 1)
+
+    def team_points(self, team_key, date_indexes):
+        return round(
+            sum(
+                self.player_points(player_key, date_indexes)
+                for player_key in self.rosters[team_key]
+            ),
+            2,
+        )
+
+    def team(self, team_key):
+        i = self.team_keys.index(team_key)
+        return {
+            "team_key": team_key,
+            "team_id": str(i + 1),
+            "name": f"Team {i + 1}",
+            "url": f"https://hockey.fantasysports.yahoo.com/hockey/{self.league_id}/{i + 1}",
+            "team_logos": {
+                "team_logo": {"size": "large", "url": f"https://logos/{i + 1}.png"}
+            },
+            "managers": {
+                "manager": {
+                    "manager_id": str(i + 1),
+                    "nickname": f"Manager {i + 1}",
+                    "image_url": f"https://managers/{i + 1}.png",
+                }
+            },
+        }
+
+    def player(self, player_key, date_indexes, coverage_type):
+        player = self.players[player_key]
+        points = self.player_points(player_key, date_indexes)
+        return {
+            "player_key": player_key,
+            "name": {"full": player["name"]},
+            "display_position": player["position"],
+            "primary_position": player["position"],
+            "image_url": f"https://players/{player_key}.png",
+            "player_stats": [
+                {
+                    "coverage_type": coverage_type,
+                    "stats": [
+                        {"stat_id": "1", "value": str(int(points // 3))},
+                        {"stat_id": HITS_STAT_ID, "value": str(int(points // 2))},
+                    ],
+                }
+            ],
+            "player_points": [{"coverage_type": coverage_type, "total": str(points)}],
+        }
+
+    def league(self, **fields):
+        return {
+            "league": {
+                "league_key": self.league_key,
+                "league_id": str(self.league_id),
+                "name": f"Synthetic {self.num_teams}",
+                **fields,
+            }
+        }
+
+    def resolve(self, path):
+        """
+        Returns the response dict for a Yahoo API path (without BASE_URL), or None if it isn't a known endpoint
+        """
+        for pattern, handler in self.routes():
+            match = re.fullmatch(pattern, path)
+            if match:
+                return handler(**match.groupdict())
+        return None
+
+    def routes(self):
+        league = re.escape(self.league_key)
+        return [
+            (rf"/league/{league};out=standings,settings", self.get_league),
+            (
+                rf"/league/{league}/scoreboard;week=(?P<weeks>[\d,]+)(/matchups)?",
+                self.get_scoreboard,
+            ),
+            (rf"/game/{GAME_ID}/game_weeks", self.get_game_weeks),
+            (rf"/league/{league}/draftresults", self.get_draft_results),
+            (rf"/league/{league}/transactions", self.get_transactions),
+            (
+                rf"/league/{league}/players;player_keys=(?P<player_keys>[^;/]*)(;start=\d+)?/stats",
+                self.get_players,
+            ),
+            (
+                rf"/league/{league}/players;sort=PTS;sort_type=season;position=(?P<position>[^;]+);count=(?P<count>\d+);start=(?P<start>\d+)/stats",
+                self.get_top_players,
+            ),
+            (
+                rf"/team/(?P<team_key>[^/]+)/roster;week=(?P<week>\d+)/players/stats;type=week;week=\d+",
+                self.get_roster,
+            ),
+            (
+                rf"/league/{league}/teams/roster;week=(?P<week>\d+)/players/stats;type=week;week=\d+",
+                self.get_league_rosters,
+            ),
+            (
+                rf"/league/{league}/teams/stats_collection;types=date;date=(?P<dates>[\d,-]+)",
+                self.get_teams_daily_stats,
+            ),
+            (
+                rf"/league/{league}/players;player_keys=(?P<player_keys>[^;/]*)/stats_collection;types=date;date=(?P<dates>[\d,-]+)",
+                self.get_players_daily_stats,
+            ),
+        ]
+
+    def get_league(self):
+        season_dates = range(len(self.dates))
+        standings = sorted(
+            self.team_keys,
+            key=lambda team_key: -self.team_points(team_key, season_dates),
+        )
+        return self.league(
+            season=str(SEASON),
+            start_date=self.dates[0],
+            end_date=self.dates[-1],
+            start_week="1",
+            end_week=str(self.num_weeks),
+            is_finished="1",
+            settings={
+                "playoff_start_week": str(self.playoff_start_week),
+                "roster_positions": [
+                    {"position": "C", "count": "2"},
+                    {"position": "LW", "count": "2"},
+                    {"position": "RW", "count": "2"},
+                    {"position": "D", "count": "4"},
+                    {"position": "G", "count": "2"},
+                    {"position": "BN", "count": "2"},
+                ],
+            },
+            standings={"teams": [self.team(team_key) for team_key in standings]},
+        )
+
+    def get_scoreboard(self, weeks):
+        matchups = []
+        for week in map(int, weeks.split(",")):
+            _, start, end = self.weeks[week - 1]
+            date_indexes = self.week_date_indexes(week)
+            for team_a, team_b in self.schedule[week]:
+                teams = [
+                    {
+                        **self.team(self.team_keys[team]),
+                        "team_points": {
+                            "coverage_type": "week",
+                            "week": str(week),
+                            "total": str(
+                                self.team_points(self.team_keys[team], date_indexes)
+                            ),
+                        },
+                    }
+                    for team in (team_a, team_b)
+                ]
+                points = [float(team["team_points"]["total"]) for team in teams]
+                matchup = {
+                    "week": str(week),
+                    "week_start": start.strftime("%Y-%m-%d"),
+                    "week_end": end.strftime("%Y-%m-%d"),
+                    "status": "postevent",
+                    "is_playoffs": str(int(week >= self.playoff_start_week)),
+                    "is_consolation": "0",
+                    "is_tied": str(int(points[0] == points[1])),
+                    "teams": teams,
+                }
+                if points[0] != points[1]:
+                    matchup["winner_team_key"] = teams[
+                        0 if points[0] > points[1] else 1
+                    ]["team_key"]
+                matchups.append(matchup)
+        return self.league(
+            scoreboard={"week": weeks.split(",")[0], "matchups": matchups}
+        )
+
+    def get_game_weeks(self):
+        return {
+            "game": {
+                "game_key": str(GAME_ID),
+                "game_id": str(GAME_ID),
+                "game_weeks": [
+                    {
+                        "week": str(week),
+                        "start": start.strftime("%Y-%m-%d"),
+                        "end": end.strftime("%Y-%m-%d"),
+                    }
+                    for week, start, end in self.weeks
+                ],
+            }
+        }
+
+    def get_draft_results(self):
+        rosters = [self.rosters[team_key] for team_key in self.team_keys]
+        draft_results = [
+            {
+                "pick": str(round_ * self.num_teams + i + 1),
+                "round": str(round_ + 1),
+                "team_key": self.team_keys[i],
+                "player_key": roster[round_],
+            }
+            for round_ in range(len(rosters[0]))
+            for i, roster in enumerate(rosters)
+        ]
+        return self.league(draft_results=draft_results)
+
+    def get_transactions(self):
+        return self.league(transactions=self.transactions)
+
+    def get_players(self, player_keys):
+        season_dates = range(len(self.dates))
+        return self.league(
+            players=[
+                self.player(player_key, season_dates, "season")
+                for player_key in player_keys.split(",")
+                if player_key
+            ]
+        )
+
+    def get_top_players(self, position, count, start):
+        positions = position.split(",")
+        season_dates = range(len(self.dates))
+        players = sorted(
+            (
+                player_key
+                for player_key, player in self.players.items()
+                if player["position"] in positions
+            ),
+            key=lambda player_key: -self.player_points(player_key, season_dates),
+        )
+        start = int(start)
+        count = min(int(count) - start, 25)
+        return self.league(
+            players=[
+                self.player(player_key, season_dates, "season")
+                for player_key in players[start : start + max(count, 0)]
+            ]
+        )
+
+    def roster(self, team_key, week):
+        date_indexes = self.week_date_indexes(week)
+        return {
+            **self.team(team_key),
+            "roster": {
+                "coverage_type": "week",
+                "week": str(week),
+                "players": [
+                    self.player(player_key, date_indexes, "week")
+                    for player_key in self.rosters[team_key]
+                ],
+            },
+        }
+
+    def get_roster(self, team_key, week):
+        return {"team": self.roster(team_key, int(week))}
+
+    def get_league_rosters(self, week):
+        return self.league(
+            teams=[self.roster(team_key, int(week)) for team_key in self.team_keys]
+        )
+
+    def daily_points_collection(self, player_key, dates):
+        points = self.daily_points[player_key]
+        return [
+            {
+                "coverage_type": "date",
+                "date": date,
+                "total": str(points[self.date_index[date]]),
+            }
+            for date in dates
+            if date in self.date_index
+        ]
+
+    def get_teams_daily_stats(self, dates):
+        dates = dates.split(",")
+        teams = []
+        for team_key in self.team_keys:
+            team_points = [
+                {
+                    "coverage_type": "date",
+                    "date": date,
+                    "total": str(self.team_points(team_key, [self.date_index[date]])),
+                }
+                for date in dates
+                if date in self.date_index
+            ]
+            teams.append(
+                {
+                    **self.team(team_key),
+                    "team_stats_collection": {
+                        "coverage": "date",
+                        "team_points": team_points,
+                    },
+                }
+            )
+        return self.league(teams=teams)
+
+    def get_players_daily_stats(self, player_keys, dates):
+        dates = dates.split(",")
+        return self.league(
+            players=[
+                {
+                    "player_key": player_key,
+                    "name": {"full": self.players[player_key]["name"]},
+                    "image_url": f"https://players/{player_key}.png",
+                    "player_stats_collection": {
+                        "coverage": "date",
+                        "player_points": self.daily_points_collection(
+                            player_key, dates
+                        ),
+                    },
+                }
+                for player_key in player_keys.split(",")
+                if player_key
+            ]
+        )
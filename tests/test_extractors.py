@@ -0,0 +1,203 @@
+import unittest
+from extractors import (
+    ScoreboardExtractor,
+    PlayerStatsExtractor,
+    DailyPointsExtractor,
+    TransactionsExtractor,
+    DraftResultsExtractor,
+)
+
+NAMESPACE = 'xmlns="http://fantasysports.yahooapis.com/fantasy/v2/base.rng"'
+
+
+def extract(extractor, xml):
+    stream = extractor()
+    body = f'<?xml version="1.0" encoding="UTF-8"?><fantasy_content {NAMESPACE}>{xml}</fantasy_content>'.encode()
+    for i in range(0, len(body), 32):
+        stream.feed(body[i : i + 32])
+    return stream.close()
+
+
+def matchup_team(team_key, name, points):
+    return f"""
+    <team>
+      <team_key>{team_key}</team_key>
+      <name>{name}</name>
+      <url>https://hockey.fantasysports.yahoo.com/{team_key}</url>
+      <team_logos><team_logo><size>large</size><url>https://logo/{team_key}.png</url></team_logo></team_logos>
+      <managers><manager><nickname>{name}</nickname><image_url>https://manager.png</image_url></manager></managers>
+      <team_points><coverage_type>week</coverage_type><week>1</week><total>{points}</total></team_points>
+      <team_projected_points><coverage_type>week</coverage_type><week>1</week><total>99.0</total></team_projected_points>
+    </team>"""
+
+
+class TestExtractors(unittest.TestCase):
+    def test_scoreboard(self):
+        matchups = extract(
+            ScoreboardExtractor,
+            f"""<league><league_key>427.l.1</league_key><scoreboard><week>1</week><matchups count="1">
+            <matchup>
+              <week>1</week><week_start>2023-10-10</week_start><week_end>2023-10-15</week_end>
+              <is_playoffs>0</is_playoffs><is_consolation>0</is_consolation><is_tied>0</is_tied>
+              <winner_team_key>427.l.1.t.2</winner_team_key>
+              <teams count="2">{matchup_team("427.l.1.t.1", "Team A", "80.5")}{matchup_team("427.l.1.t.2", "Team B", "101.2")}</teams>
+            </matchup></matchups></scoreboard></league>""",
+        )
+        self.assertEqual(len(matchups), 1)
+        matchup = matchups[0]
+        self.assertEqual(matchup.week, 1)
+        self.assertEqual(matchup.week_start, "2023-10-10")
+        self.assertEqual(matchup.week_end, "2023-10-15")
+        self.assertEqual(matchup.is_tied, 0)
+        self.assertEqual(matchup.winner_team_key, "427.l.1.t.2")
+        self.assertEqual(
+            [
+                (team.team_key, team.name, team.logo_url, team.points)
+                for team in matchup.teams
+            ],
+            [
+                ("427.l.1.t.1", "Team A", "https://logo/427.l.1.t.1.png", 80.5),
+                ("427.l.1.t.2", "Team B", "https://logo/427.l.1.t.2.png", 101.2),
+            ],
+        )
+
+    def test_roster_player_stats(self):
+        players = extract(
+            PlayerStatsExtractor,
+            """<team><team_key>427.l.1.t.3</team_key><name>Team C</name><roster><players count="2">
+            <player>
+              <player_key>427.p.6743</player_key><name><full>Connor McDavid</full></name>
+              <display_position>C</display_position><primary_position>C</primary_position>
+              <image_url>https://mcdavid.png</image_url>
+              <player_stats><coverage_type>week</coverage_type><stats>
+                <stat><stat_id>1</stat_id><value>3</value></stat>
+                <stat><stat_id>31</stat_id><value>4</value></stat>
+              </stats></player_stats>
+              <player_points><coverage_type>week</coverage_type><total>21.5</total></player_points>
+            </player>
+            <player>
+              <player_key>427.p.1</player_key><name><full>Backup Goalie</full></name>
+              <player_stats><stats><stat><stat_id>31</stat_id><value>-</value></stat></stats></player_stats>
+              <player_points><total></total></player_points>
+            </player>
+            </players></roster></team>""",
+        )
+        self.assertEqual(
+            [
+                (
+                    player.team_key,
+                    player.player_key,
+                    player.name,
+                    player.image_url,
+                    player.points,
+                    player.hits,
+                )
+                for player in players
+            ],
+            [
+                (
+                    "427.l.1.t.3",
+                    "427.p.6743",
+                    "Connor McDavid",
+                    "https://mcdavid.png",
+                    21.5,
+                    4,
+                ),
+                ("427.l.1.t.3", "427.p.1", "Backup Goalie", None, 0.0, 0),
+            ],
+        )
+        self.assertEqual(players[0].primary_position, "C")
+
+    def test_league_rosters_player_stats(self):
+        players = extract(
+            PlayerStatsExtractor,
+            """<league><league_key>427.l.1</league_key><teams count="2">
+            <team><team_key>427.l.1.t.1</team_key><roster><week>2</week><players count="1">
+              <player><player_key>427.p.1</player_key><player_points><total>4.5</total></player_points></player>
+            </players></roster></team>
+            <team><team_key>427.l.1.t.2</team_key><roster><week>2</week><players count="2">
+              <player><player_key>427.p.2</player_key><player_points><total>2</total></player_points></player>
+              <player><player_key>427.p.3</player_key><player_points><total>0</total></player_points></player>
+            </players></roster></team>
+            </teams></league>""",
+        )
+        self.assertEqual(
+            [(player.team_key, player.player_key, player.points) for player in players],
+            [
+                ("427.l.1.t.1", "427.p.1", 4.5),
+                ("427.l.1.t.2", "427.p.2", 2.0),
+                ("427.l.1.t.2", "427.p.3", 0.0),
+            ],
+        )
+
+    def test_daily_points(self):
+        teams = extract(
+            DailyPointsExtractor,
+            """<league><teams count="1"><team><team_key>427.l.1.t.1</team_key><name>Team A</name>
+            <team_stats_collection><coverage>date</coverage>
+              <team_points><coverage_type>date</coverage_type><date>2023-10-10</date><total>10.5</total></team_points>
+              <team_points><coverage_type>date</coverage_type><date>2023-10-11</date><total>0</total></team_points>
+            </team_stats_collection></team></teams></league>""",
+        )
+        self.assertEqual(teams[0].key, "427.l.1.t.1")
+        self.assertEqual(teams[0].name, "Team A")
+        self.assertEqual(
+            teams[0].points_by_date, {"2023-10-10": 10.5, "2023-10-11": 0.0}
+        )
+
+    def test_transactions(self):
+        transactions = extract(
+            TransactionsExtractor,
+            """<league><transactions count="2">
+            <transaction><transaction_key>427.l.1.tr.2</transaction_key><type>add/drop</type><status>successful</status>
+              <timestamp>1700000000</timestamp><players count="2">
+                <player><player_key>427.p.1</player_key><name><full>Added Guy</full></name>
+                  <transaction_data><type>add</type><source_type>freeagents</source_type>
+                  <destination_type>team</destination_type><destination_team_key>427.l.1.t.1</destination_team_key></transaction_data></player>
+                <player><player_key>427.p.2</player_key><name><full>Dropped Guy</full></name>
+                  <transaction_data><type>drop</type><source_type>team</source_type>
+                  <source_team_key>427.l.1.t.1</source_team_key></transaction_data></player>
+              </players></transaction>
+            <transaction><type>commish</type><status>successful</status><timestamp>1690000000</timestamp></transaction>
+            </transactions></league>""",
+        )
+        self.assertEqual(len(transactions), 2)
+        self.assertEqual(transactions[0].type, "add/drop")
+        self.assertEqual(transactions[0].timestamp, 1700000000)
+        self.assertEqual(
+            [
+                (
+                    player.player_key,
+                    player.name,
+                    player.type,
+                    player.source_team_key,
+                    player.destination_team_key,
+                )
+                for player in transactions[0].players
+            ],
+            [
+                ("427.p.1", "Added Guy", "add", None, "427.l.1.t.1"),
+                ("427.p.2", "Dropped Guy", "drop", "427.l.1.t.1", None),
+            ],
+        )
+        self.assertEqual(transactions[1].players, [])
+
+    def test_draft_results(self):
+        draft_results = extract(
+            DraftResultsExtractor,
+            """<league><draft_results count="2">
+            <draft_result><pick>1</pick><round>1</round><team_key>427.l.1.t.1</team_key><player_key>427.p.6743</player_key></draft_result>
+            <draft_result><pick>2</pick><round>1</round><team_key>427.l.1.t.2</team_key><player_key>427.p.1</player_key></draft_result>
+            </draft_results></league>""",
+        )
+        self.assertEqual(
+            [
+                (pick.pick, pick.round, pick.team_key, pick.player_key)
+                for pick in draft_results
+            ],
+            [(1, 1, "427.l.1.t.1", "427.p.6743"), (2, 1, "427.l.1.t.2", "427.p.1")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import contextlib
+import io
+import unittest
+from instrumentation import MetricsRegistry, current_span, metric_span
+
+
+async def fake_request(latency, num_bytes):
+    span = current_span.get()
+    span.request_started()
+    await asyncio.sleep(0)
+    span.request_finished(latency, num_bytes, 0.001)
+
+
+class TestInstrumentation(unittest.IsolatedAsyncioTestCase):
+    async def run_metric(self, name, requests):
+        with metric_span(name, "427.l.1") as span:
+            await asyncio.gather(*(fake_request(*request) for request in requests))
+        return span
+
+    async def test_concurrent_spans_are_isolated(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            a, b = await asyncio.gather(
+                self.run_metric("a", [(0.01, 100), (0.2, 50)]),
+                self.run_metric("b", [(3.0, 10)]),
+            )
+        self.assertEqual((a.requests, a.bytes_received), (2, 150))
+        self.assertEqual((b.requests, b.bytes_received), (1, 10))
+        self.assertEqual(a.latency_counts[:4], [1, 0, 1, 0])
+        self.assertIsNone(current_span.get())
+
+        registry = MetricsRegistry()
+        registry.record(a)
+        registry.record(b)
+        text = registry.render()
+        self.assertIn('wrapped_yahoo_requests_total{phase="metric",metric="a"} 2', text)
+        self.assertIn(
+            'wrapped_yahoo_request_duration_seconds_bucket{phase="metric",metric="a",le="0.25"} 2',
+            text,
+        )
+        self.assertIn(
+            'wrapped_yahoo_request_duration_seconds_count{phase="metric",metric="b"} 1',
+            text,
+        )
+
+    async def test_phase_label(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            with metric_span("query_setup", "427.l.1", phase="setup") as setup:
+                pass
+            metric = await self.run_metric("a", [])
+        registry = MetricsRegistry()
+        registry.record(setup)
+        registry.record(metric)
+        text = registry.render()
+        # Request plumbing is kept apart from the metric runs
+        self.assertIn(
+            'wrapped_metric_runs_total{phase="setup",metric="query_setup"} 1', text
+        )
+        self.assertIn('wrapped_metric_runs_total{phase="metric",metric="a"} 1', text)
+        self.assertNotIn('phase="metric",metric="query_setup"', text)
+
+    async def test_failed_span(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(ValueError):
+                with metric_span("c", "427.l.1") as span:
+                    raise ValueError
+        self.assertTrue(span.failed)
+
+
+if __name__ == "__main__":
+    unittest.main()
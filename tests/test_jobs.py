@@ -0,0 +1,156 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from jobs import JobRegistry, JobStore
+
+
+class TestJobRegistry(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.starts = 0
+        self.release = asyncio.Event()
+        self.registry = JobRegistry()
+        await self.registry.start(self.run_job, JobStore(":memory:"), num_workers=1)
+
+    async def asyncTearDown(self):
+        await self.registry.stop()
+
+    async def run_job(self, job):
+        self.starts += 1
+        if job.key == "broken":
+            raise ValueError("Yahoo is down")
+        yield "a"
+        await self.release.wait()
+        job.progress = {"completed": 1, "total": 1}
+        yield "b"
+
+    async def test_subscribers_share_one_job(self):
+        first = await self.registry.submit("league", {"access_token": "a"})
+        first_events = []
+
+        async def follow():
+            async for event in first.subscribe():
+                first_events.append(event)
+                if event == "a":
+                    # Joins after "a" was emitted
+                    late = await self.registry.submit("league", {"access_token": "b"})
+                    self.assertIs(late, first)
+                    self.assertEqual(
+                        (await self.registry.get(first.id))["status"], "running"
+                    )
+                    self.release.set()
+
+        await follow()
+        late_events = [event async for event in first.subscribe()]
+        self.assertEqual(self.starts, 1)
+        self.assertEqual(first_events, ["a", "b"])
+        self.assertEqual(late_events, ["a", "b"])
+        await asyncio.sleep(0.05)
+        # Finished jobs are only kept in the store
+        status = await self.registry.get(first.id)
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(status["progress"], {"completed": 1, "total": 1})
+        self.assertIsNot(await self.registry.submit("league", {}), first)
+
+    async def test_one_job_at_a_time_per_worker(self):
+        first = await self.registry.submit("league", {})
+        second = await self.registry.submit("other league", {})
+        await asyncio.sleep(0.05)
+        self.assertEqual(first.status, "running")
+        self.assertEqual(second.status, "queued")
+        self.release.set()
+        self.assertEqual([event async for event in second.subscribe()], ["a", "b"])
+
+    async def test_error_after_replay(self):
+        job = await self.registry.submit("broken", {})
+        with self.assertRaises(ValueError):
+            async for _ in job.subscribe():
+                pass
+        await asyncio.sleep(0.05)
+        self.assertEqual((await self.registry.get(job.id))["status"], "failed")
+        self.assertIsNone(await self.registry.get("missing"))
+
+
+class TestDisconnectPolicy(unittest.IsolatedAsyncioTestCase):
+    async def run_job(self, job):
+        yield "a"
+        await asyncio.Event().wait()
+
+    async def follow_and_disconnect(self, policy, detach=False):
+        registry = JobRegistry(disconnect_policy=policy)
+        await registry.start(self.run_job, JobStore(":memory:"), num_workers=1)
+        job = await registry.submit("league", {}, detach=detach)
+        subscription = job.subscribe()
+        self.assertEqual(await anext(subscription), "a")
+        await subscription.aclose()  # What a client disconnecting does
+        await asyncio.sleep(0.05)
+        status = job.status
+        await registry.stop()
+        return status
+
+    async def test_detach(self):
+        self.assertEqual(await self.follow_and_disconnect("detach"), "running")
+
+    async def test_cancel(self):
+        self.assertEqual(await self.follow_and_disconnect("cancel"), "cancelled")
+        # Jobs submitted to run in the background aren't tied to their followers
+        self.assertEqual(
+            await self.follow_and_disconnect("cancel", detach=True), "running"
+        )
+
+
+class TestJobStore(unittest.IsolatedAsyncioTestCase):
+    async def test_resume_after_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "jobs.sqlite3")
+            registry = JobRegistry()
+            await registry.start(self.never_finishes, JobStore(path), num_workers=1)
+            token = {"access_token": "secret-access", "refresh_token": "secret-refresh"}
+            running = await registry.submit("league", token)
+            queued = await registry.submit("other league", token)
+            await asyncio.sleep(0.05)
+            await registry.stop()
+            with open(path, "rb") as f:
+                self.assertNotIn(b"secret", f.read())
+
+            resumed = []
+
+            async def run_job(job):
+                resumed.append((job.id, job.token))
+                yield "a"
+
+            await registry.start(run_job, JobStore(path), num_workers=1)
+            await asyncio.sleep(0.05)
+            # Waits for a request with a token
+            self.assertEqual(resumed, [])
+            self.assertEqual((await registry.get(running.id))["status"], "queued")
+            job = await registry.submit("other league", {"access_token": "new"})
+            self.assertEqual(job.id, queued.id)
+            await asyncio.sleep(0.05)
+            self.assertEqual(resumed, [(queued.id, {"access_token": "new"})])
+            self.assertEqual((await registry.get(queued.id))["status"], "done")
+            await registry.stop()
+
+    def test_drops_persisted_tokens(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "jobs.sqlite3")
+            connection = sqlite3.connect(path)
+            with connection:
+                connection.execute(
+                    "CREATE TABLE jobs (id, league_key, access_token, refresh_token)"
+                )
+                connection.execute("INSERT INTO jobs VALUES ('1', 'league', 'a', 'r')")
+            connection.close()
+            store = JobStore(path)
+            self.assertIsNone(store.load("1"))
+            self.assertEqual(store.load_unfinished(), [])
+            store.close()
+
+    async def never_finishes(self, job):
+        await asyncio.Event().wait()
+        yield
+
+
+if __name__ == "__main__":
+    unittest.main()
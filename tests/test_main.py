@@ -0,0 +1,47 @@
+import json
+import unittest
+from fastapi.testclient import TestClient
+from bench_wrapped import MemoryFirestore
+import main
+from jobs import Job
+from metrics import METRICS
+
+
+class TestWrappedEndpoint(unittest.TestCase):
+    def setUp(self):
+        # Not entered as a context manager, the lifespan (Firestore, job workers) doesn't run
+        self.client = TestClient(main.app)
+        main.app.state.db = MemoryFirestore()
+
+    def test_invalid_stream(self):
+        response = self.client.get("/wrapped/427.l.1?stream=bogus")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("stream must be one of", response.json()["error"])
+
+    def test_missing_token(self):
+        response = self.client.get("/wrapped/427.l.1")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"error": "Missing or invalid access token"})
+
+
+class TestRunWrapped(unittest.IsolatedAsyncioTestCase):
+    async def test_cached_slides_are_separate_events(self):
+        main.app.state.db = MemoryFirestore()
+        results = {name: [json.dumps([{"title": name}])] for name in METRICS}
+        results["get_draft_busts_steals"].append(json.dumps([{"title": "steals"}]))
+        doc_ref = main.app.state.db.collection("wrapped").document("427.l.1")
+        await doc_ref.set({"results": results})
+
+        job = Job("1", "427.l.1", {})
+        events = [event async for event in main.run_wrapped(job)]
+
+        # One per slide so Job.subscribe can pace them
+        self.assertEqual(len(events), len(METRICS) + 1)
+        self.assertEqual(events[0], results["get_standings"][0] + "\n")
+        self.assertEqual(
+            job.progress, {"completed": len(METRICS), "total": len(METRICS)}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
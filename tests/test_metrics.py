@@ -1,88 +1,224 @@
 import unittest
-from unittest.mock import AsyncMock, patch, MagicMock
-from datetime import datetime, timedelta
-from collections import defaultdict
-from metrics import Metrics
+from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime
+import numpy as np
+from extractors import (
+    DailyPoints,
+    DraftPick,
+    Matchup,
+    MatchupTeam,
+    PlayerStats,
+    Transaction,
+    TransactionPlayer,
+)
+from metrics import Metrics, get_max_deficits, get_schedule_swap_matrix
 
 
-class TestMetrics(unittest.TestCase):
+def make_transaction(date, *players):
+    transaction = Transaction()
+    transaction.timestamp = int(datetime.strptime(date, "%Y-%m-%d %H:%M").timestamp())
+    for player_key, type, team_key in players:
+        player = TransactionPlayer()
+        player.player_key = player_key
+        player.type = type
+        if type == "drop":
+            player.source_team_key = team_key
+        else:
+            player.destination_team_key = team_key
+        transaction.players.append(player)
+    return transaction
+
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         # Mock the query object
         self.query = MagicMock()
         self.query.league_id = "97108"
         self.query.game_id = 427
-        self.query.league_key = f"{game_id}.l.{league_id}"
+        self.query.league_key = f"{self.query.game_id}.l.{self.query.league_id}"
 
         self.query.league_start_date_str = "2023-01-01"
         self.query.league_end_date_str = "2023-12-31"
-        self.query.get_players_points_by_date = AsyncMock()
+        self.query.get_players_daily_points = AsyncMock()
         self.query.get_team_name_from_key = MagicMock(return_value="Team Name")
-        self.query.get_response = AsyncMock()
+        self.datasets = {}  # Query.get_dataset results by name
+        self.query.get_dataset = AsyncMock(side_effect=self.datasets.__getitem__)
 
         # Create an instance of Metrics with the mocked query
         self.metrics = Metrics(self.query)
 
-    @patch("metrics.datetime")
-    @patch("metrics.defaultdict")
-    async def test_get_worst_drops(self, mock_defaultdict, mock_datetime):
-        # Mock datetime
-        mock_datetime.strptime.side_effect = lambda *args, **kw: datetime.strptime(
-            *args, **kw
-        )
-        mock_datetime.fromtimestamp.side_effect = (
-            lambda *args, **kw: datetime.fromtimestamp(*args, **kw)
-        )
+    async def test_get_worst_drops(self):
+        # Newest first like Yahoo
+        self.datasets["transactions"] = [
+            make_transaction("2023-03-01 12:00", ("player2", "add", "team1")),
+            make_transaction("2023-02-01 12:00", ("player2", "drop", "team1")),
+            make_transaction(
+                "2022-12-31 23:00",
+                ("player1", "drop", "team1"),
+                ("player3", "add", "team2"),
+            ),
+        ]
+
+        async def get_players_daily_points(player_keys, dates):
+            players, points = {}, np.zeros((len(player_keys), len(dates)))
+            for row, player_key in enumerate(player_keys):
+                players[player_key] = DailyPoints()
+                players[player_key].name = player_key.title()
+                for day in ("2023-01-01", "2023-02-15", "2023-03-01", "2023-12-31"):
+                    if day in dates:
+                        points[row, dates.index(day)] = 2.5
+            return players, points
+
+        self.query.get_players_daily_points.side_effect = get_players_daily_points
 
-        # Mock defaultdict
-        mock_defaultdict.side_effect = lambda *args, **kw: defaultdict(*args, **kw)
-
-        # Mock transactions response
-        self.query.get_response.return_value = {
-            "league": {
-                "transactions": [
-                    {
-                        "timestamp": "1672531199",
-                        "players": [
-                            {
-                                "player_key": "player1",
-                                "transaction_data": {
-                                    "type": "drop",
-                                    "source_team_key": "team1",
-                                },
-                            },
-                            {
-                                "player_key": "player2",
-                                "transaction_data": {
-                                    "type": "add",
-                                    "destination_team_key": "team2",
-                                },
-                            },
-                        ],
-                    }
-                ]
-            }
-        }
-
-        # Mock get_players_points_by_date response
-        self.query.get_players_points_by_date.return_value = {
-            "player1team1": {
-                "name": "Player 1",
-                "image_url": "http://example.com/player1.png",
-                "team_keys": ["team1"],
-                "points": 10.0,
-            }
-        }
-
-        # Call the function
         result = await self.metrics.get_worst_drops()
 
-        # Assertions
+        # Every dropped player's points are fetched in one call
+        self.query.get_players_daily_points.assert_awaited_once()
+        player_keys, dates = self.query.get_players_daily_points.await_args.args
+        self.assertCountEqual(player_keys, ["player1", "player2"])
+        self.assertEqual((dates[0], dates[-1]), ("2023-01-01", "2023-12-31"))
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]["id"], "the_one_that_got_away")
-        self.assertEqual(len(result[0]["data"]), 1)
-        self.assertEqual(result[0]["data"][0]["main_text"], "Player 1")
+        self.assertEqual(len(result[0]["data"]), 2)
+        # Dropped before the season, scores every day of it
+        self.assertEqual(result[0]["data"][0]["main_text"], "Player1")
         self.assertEqual(result[0]["data"][0]["sub_text"], "Team Name")
         self.assertEqual(result[0]["data"][0]["stat"], "10.0 pts")
+        # Only scores until team1 adds them back
+        self.assertEqual(result[0]["data"][1]["main_text"], "Player2")
+        self.assertEqual(result[0]["data"][1]["stat"], "2.5 pts")
+
+    async def test_get_draft_busts_steals(self):
+        picks = []
+        for player_key, team_key in [("p1", "t1"), ("p2", "t2"), ("p3", "t1")]:
+            pick = DraftPick()
+            pick.player_key, pick.team_key = player_key, team_key
+            picks.append(pick)
+        self.datasets["draft_results"] = picks
+
+        def make_player(player_key, points):
+            player = PlayerStats()
+            player.player_key, player.name = player_key, player_key.upper()
+            player.primary_position, player.points = "C", points
+            return player
+
+        # Out of draft order and p2 is missing
+        self.datasets["draft_players"] = [
+            make_player("p3", 12.0),
+            make_player("p1", 15.0),
+        ]
+        top_players = [make_player("top1", 20.0), make_player("top2", 10.0)]
+        self.query.get_top_n_players_by_position = AsyncMock(
+            side_effect=lambda n, position: top_players[:n]
+        )
+
+        busts, steals = await self.metrics.get_draft_busts_steals()
+
+        # p1 was picked first so it's measured against the best forward
+        self.assertEqual(busts["data"][0]["main_text"], "P1")
+        self.assertEqual(busts["data"][0]["stat"], "-5.0 pts")
+        self.assertEqual(steals["data"][0]["main_text"], "P3")
+        self.assertEqual(steals["data"][0]["stat"], "+2.0 pts")
+
+    async def test_get_best_worst_drafts(self):
+        picks = []
+        for player_key, team_key in [("p1", "t1"), ("p2", "t2"), ("p3", "t1")]:
+            pick = DraftPick()
+            pick.player_key, pick.team_key = player_key, team_key
+            picks.append(pick)
+        self.datasets["draft_results"] = picks
+        self.query.get_teams = MagicMock(return_value={"t1": {}, "t2": {}})
+        players = []
+        # Out of draft order and p3 is missing
+        for player_key, points in [("p2", 5.0), ("p1", 10.0)]:
+            player = PlayerStats()
+            player.player_key, player.points = player_key, points
+            players.append(player)
+        self.datasets["draft_players"] = players
+
+        result = await self.metrics.get_best_worst_drafts()
+
+        self.assertEqual(result[0]["data"][0]["stat"], 10.0)
+        self.assertEqual(result[1]["data"][0]["stat"], 5.0)
+
+    async def test_get_biggest_comebacks(self):
+        teams = []
+        for team_key in ("t1", "t2"):
+            team = MatchupTeam()
+            team.team_key, team.name = team_key, team_key.upper()
+            teams.append(team)
+        # A playoff week past the league's regular weeks
+        matchup = Matchup()
+        matchup.week = 30
+        matchup.week_start, matchup.week_end = "2024-03-25", "2024-03-31"
+        matchup.winner_team_key, matchup.teams = "t2", teams
+        self.query.matchups = [matchup]
+        self.query.team_index = {"t1": 0, "t2": 1}
+        requested = {}
+
+        async def iter_team_daily_points(dates_by_week):
+            requested.update(dates_by_week)
+            for week, dates in dates_by_week.items():
+                points = np.zeros((2, len(dates)))
+                points[0, 0] = 8.0
+                points[1, -1] = 5.0
+                yield week, dates, points
+
+        self.query.iter_team_daily_points = iter_team_daily_points
+
+        result = await self.metrics.get_biggest_comebacks()
+
+        # Every day of the matchup but the last
+        self.assertEqual(requested[30][0], "2024-03-25")
+        self.assertEqual(requested[30][-1], "2024-03-30")
+        self.assertEqual(len(requested[30]), 6)
+        self.assertEqual(result[0]["data"][0]["main_text"], "T2")
+        self.assertEqual(result[0]["data"][0]["stat"], "8.0 pts")
+
+
+class TestScheduleSwapMatrix(unittest.TestCase):
+    def test_get_schedule_swap_matrix(self):
+        # Week 1: 0 vs 1, 2 vs 3. Week 2: 0 vs 2, 1 vs 3. Week 3: 0 vs 3, 1 vs 2
+        points = np.array(
+            [
+                [100.0, 90.0, 80.0],
+                [95.0, 70.0, 85.0],
+                [60.0, 110.0, 85.0],
+                [120.0, 75.0, 82.0],
+            ]
+        )
+        opponents = np.array([[1, 2, 3], [0, 3, 2], [3, 0, 1], [2, 1, 0]])
+        win_pcts = get_schedule_swap_matrix(points, opponents)
+        # Diagonal is each team's actual record, week 3 of team 1 vs team 2 is a tie
+        np.testing.assert_allclose(np.diag(win_pcts), [1 / 3, 1 / 6, 1 / 2, 1.0])
+        # Team 0 on team 1's schedule skips week 1 (team 1 played team 0): 90 > 75 and 80 < 85
+        self.assertAlmostEqual(win_pcts[0, 1], 0.5)
+        # Team 2 on team 3's schedule skips week 1: 110 > 70 and 85 > 80
+        self.assertAlmostEqual(win_pcts[2, 3], 1.0)
+
+    def test_get_schedule_swap_matrix_bye_week(self):
+        points = np.array([[10.0, 20.0], [5.0, 0.0], [7.0, 30.0]])
+        opponents = np.array([[1, 2], [0, -1], [-1, 0]])
+        win_pcts = get_schedule_swap_matrix(points, opponents)
+        self.assertAlmostEqual(win_pcts[0, 0], 0.5)
+        self.assertAlmostEqual(win_pcts[1, 1], 0.0)
+        self.assertAlmostEqual(win_pcts[2, 2], 1.0)
+
+
+class TestMaxDeficits(unittest.TestCase):
+    def test_get_max_deficits(self):
+        points = np.array(
+            [
+                [10.0, 10.0, 30.0],
+                [20.0, 15.0, 0.0],
+                [5.0, 5.0, 5.0],
+                [1.0, 1.0, 1.0],
+            ]
+        )
+        # 0 beat 1 after trailing by 10 then 15, 2 beat 3 without ever trailing
+        max_deficits = get_max_deficits(points, [0, 2], [1, 3])
+        np.testing.assert_allclose(max_deficits, [15.0, 0.0])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import unittest
+from extractors import DraftPick
+from query import METRICS_META, Query
+
+SLIDES = {
+    "get_standings": ["official_standings"],
+    "get_alternative_realities": ["alternative_realities"],
+    "get_draft_busts_steals": ["draft_busts", "draft_steals"],
+    "get_team_season_data": ["one_man_army", "team_tormentor"],
+    "get_biggest_comebacks": ["biggest_comeback"],
+    "get_worst_drops": ["the_one_that_got_away"],
+}
+
+
+class TestGetMetrics(unittest.IsolatedAsyncioTestCase):
+    def make_query(self, seconds):
+        query = Query.__new__(Query)
+        query.doc_ref = None
+
+        self.cancelled = []
+
+        async def run_metric(metrics, name):
+            try:
+                await asyncio.sleep(seconds.get(name, 0))
+            except asyncio.CancelledError:
+                self.cancelled.append(name)
+                raise
+            return name, [{"id": slide, "data": []} for slide in SLIDES[name]]
+
+        query.run_metric = run_metric
+        return query
+
+    async def get_slides(self, query, *args, **kwargs):
+        return [
+            json.loads(metric)[0] async for metric in query.get_metrics(*args, **kwargs)
+        ]
+
+    async def test_display_order(self):
+        # Later slides finish first
+        seconds = {name: 0.01 * (len(SLIDES) - i) for i, name in enumerate(SLIDES)}
+        query = self.make_query(seconds)
+        cached = json.dumps([{"title": "Alternative Realities", "data": "cached"}])
+        slides = await self.get_slides(
+            query, {"get_alternative_realities": [cached]}, pace=0, max_wait=None
+        )
+        titles = [METRICS_META[slide]["title"] for slide in METRICS_META]
+        self.assertEqual([slide["title"] for slide in slides], titles[:8])
+        self.assertEqual(slides[1]["data"], "cached")
+        self.assertFalse(any("position" in slide for slide in slides))
+
+    async def test_head_of_line_wait(self):
+        query = self.make_query({"get_standings": 0.2})
+        slides = await self.get_slides(query, pace=0, max_wait=0.05)
+        # Everything behind the slow first slide is sent with its position once the wait is over
+        self.assertEqual(
+            [slide.get("position") for slide in slides], [1, 2, 3, 4, 5, 6, 7, None]
+        )
+        self.assertEqual(slides[-1]["title"], '"Official" Results')
+
+    async def test_close_stops_metrics(self):
+        query = self.make_query({name: 10 for name in list(SLIDES)[1:]})
+        metrics = query.get_metrics(pace=0)
+        await anext(metrics)
+        await metrics.aclose()
+        # The metrics still running were cancelled and have finished by the time the consumer is closed
+        self.assertCountEqual(self.cancelled, list(SLIDES)[1:])
+
+
+class TestDatasets(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.query = Query.__new__(Query)
+        self.query.league_key = "427.l.1"
+        self.query.dataset_cache = {}
+        self.urls = []
+        self.player_keys = []
+        pick = DraftPick()
+        pick.player_key = "p1"
+
+        async def get_response(url, decoder):
+            self.urls.append(url)
+            await asyncio.sleep(0.01)
+            return [pick] if url.endswith("draftresults") else ["transaction"]
+
+        async def get_players(player_keys):
+            self.player_keys.append(player_keys)
+            await asyncio.sleep(0.05)
+            return ["player"]
+
+        self.query.get_response = get_response
+        self.query.get_players = get_players
+
+    async def test_loaded_once_after_dependencies(self):
+        players, picks, _ = await asyncio.gather(
+            self.query.get_dataset("draft_players"),
+            self.query.get_dataset("draft_results"),
+            self.query.get_dataset("draft_players"),
+        )
+        self.assertEqual(players, ["player"])
+        self.assertEqual(self.urls, ["/league/427.l.1/draftresults"])
+        # draft_players is built from the draft_results the other readers got
+        self.assertEqual(self.player_keys, [["p1"]])
+        self.assertEqual([pick.player_key for pick in picks], ["p1"])
+
+    def loaded(self):
+        return {name for name, task in self.query.dataset_cache.items() if task.done()}
+
+    async def test_metrics_start_once_inputs_resolve(self):
+        started = []
+
+        class StubMetrics:
+            async def get_worst_drops(metrics):
+                started.append(("get_worst_drops", self.loaded()))
+                return []
+
+            async def get_draft_busts_steals(metrics):
+                started.append(("get_draft_busts_steals", self.loaded()))
+                return []
+
+        await asyncio.gather(
+            self.query.run_metric(StubMetrics(), "get_draft_busts_steals"),
+            self.query.run_metric(StubMetrics(), "get_worst_drops"),
+        )
+        # Each metric starts as soon as its own datasets are loaded, without waiting for the others'
+        self.assertEqual(
+            started,
+            [
+                ("get_worst_drops", {"transactions", "draft_results"}),
+                (
+                    "get_draft_busts_steals",
+                    {"transactions", "draft_results", "draft_players"},
+                ),
+            ],
+        )
+        self.assertTrue(all(task.done() for task in self.query.dataset_cache.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
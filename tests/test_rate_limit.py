@@ -0,0 +1,132 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+import aiohttp
+from query import Query
+from rate_limit import (
+    BACKOFF_MAX,
+    CircuitBreaker,
+    PrioritySemaphore,
+    TokenBucket,
+    YahooUnavailableError,
+    get_backoff,
+)
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    async def test_paces_after_burst(self):
+        bucket = TokenBucket(rate=100, capacity=5)
+        start = time.monotonic()
+        for _ in range(10):
+            await bucket.acquire()
+        # 5 from the burst, the other 5 at 100/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_throttle_once_per_burst(self):
+        bucket = TokenBucket(rate=40, capacity=10)
+        bucket.throttled()
+        bucket.throttled()
+        self.assertEqual(bucket.rate, 20)
+        bucket.succeeded()
+        self.assertGreater(bucket.rate, 20)
+
+
+class TestPrioritySemaphore(unittest.IsolatedAsyncioTestCase):
+    async def test_lowest_priority_first(self):
+        semaphore = PrioritySemaphore(1)
+        order = []
+
+        async def request(priority):
+            async with semaphore.slot(priority):
+                order.append(priority)
+                await asyncio.sleep(0)
+
+        await semaphore.acquire()
+        tasks = [asyncio.create_task(request(priority)) for priority in (3, 1, 2, 1)]
+        await asyncio.sleep(0)
+        tasks[2].cancel()  # Gives up while waiting
+        semaphore.release()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertEqual(order, [1, 1, 3])
+        self.assertEqual(semaphore.value, 1)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_open_probe_close(self):
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=0.01)
+        breaker.record_failure()
+        breaker.check()
+        breaker.record_failure()
+        with self.assertRaises(YahooUnavailableError):
+            breaker.check()
+        time.sleep(0.02)
+        breaker.check()  # Probe
+        with self.assertRaises(YahooUnavailableError):
+            breaker.check()  # Only one probe at a time
+        breaker.record_success()
+        breaker.check()
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.check()
+        breaker.record_failure()
+        with self.assertRaises(YahooUnavailableError):
+            breaker.check()
+
+
+class StubOAuth:
+    access_token = "token"
+    refresh_token = "refresh"
+
+
+class TestProbeRetries(unittest.IsolatedAsyncioTestCase):
+    async def test_probe_retries_then_closes(self):
+        query = Query.__new__(Query)
+        query.oauth = StubOAuth()
+        query.app_limiter = TokenBucket(rate=100, capacity=10)
+        query.user_limiter = TokenBucket(rate=100, capacity=10)
+        query.circuit_breaker = CircuitBreaker(failure_threshold=1, cooldown=0.01)
+        query.circuit_breaker.record_failure()
+        time.sleep(0.02)
+        responses = [
+            aiohttp.ClientResponseError(None, (), status=999),
+            {"league": {}},
+        ]
+
+        async def fetch_response_once(url, decoder, access_token):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        query.fetch_response_once = fetch_response_once
+        with patch("query.get_backoff", return_value=0):
+            # The probe's own retry isn't turned away by the breaker
+            self.assertEqual(
+                await query.fetch_response("/league", None), {"league": {}}
+            )
+        self.assertIsNone(query.circuit_breaker.opened_at)
+        self.assertFalse(query.circuit_breaker.probing)
+
+    async def test_inconclusive_probe_lets_next_request_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        self.assertTrue(breaker.check())
+        breaker.end_probe()  # e.g. the probe was cancelled
+        self.assertTrue(breaker.check())
+
+
+class TestBackoff(unittest.TestCase):
+    def test_backoff(self):
+        for attempt in range(10):
+            self.assertLessEqual(get_backoff(attempt), BACKOFF_MAX)
+        self.assertGreaterEqual(get_backoff(0, "3"), 3)
+        self.assertLessEqual(get_backoff(0, "600"), BACKOFF_MAX)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import asyncio
+import time
+import unittest
+from token_manager import TokenManager
+
+
+class StubOAuth:
+    """
+    Stands in for YahooOAuthWrapper, refresh_access_token blocks like the real one
+    """
+
+    refreshes = 0
+
+    def __init__(self, access_token, refresh_token):
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+
+    def refresh_access_token(self):
+        time.sleep(0.05)
+        StubOAuth.refreshes += 1
+        self.access_token = f"refreshed-{StubOAuth.refreshes}"
+
+
+class TestTokenManager(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_refreshes_share_one_call(self):
+        StubOAuth.refreshes = 0
+        token_manager = TokenManager()
+        # Two Query instances for the same user
+        oauths = [StubOAuth("expired", "refresh"), StubOAuth("expired", "refresh")]
+        self.assertEqual(token_manager.get_access_token(oauths[0]), "expired")
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        access_tokens = await asyncio.gather(
+            *(token_manager.refresh(oauths[i % 2], "expired") for i in range(10))
+        )
+        ticker.cancel()
+
+        self.assertEqual(StubOAuth.refreshes, 1)
+        self.assertEqual(set(access_tokens), {"refreshed-1"})
+        self.assertEqual(token_manager.get_access_token(oauths[1]), "refreshed-1")
+        self.assertGreater(ticks, 2)  # The loop kept running during the refresh
+        # A caller still holding the old token doesn't trigger another refresh
+        self.assertEqual(
+            await token_manager.refresh(oauths[1], "expired"), "refreshed-1"
+        )
+        self.assertEqual(StubOAuth.refreshes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
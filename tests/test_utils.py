@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from utils import XmlDecoder, read_json_file, write_json_file, xml_to_dict
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<fantasy_content xmlns="http://fantasysports.yahooapis.com/fantasy/v2/base.rng">
+  <league>
+    <league_key>427.l.97108</league_key>
+    <name>Men2</name>
+    <players count="1">
+      <player>
+        <player_key>427.p.6743</player_key>
+        <name><full>Connor McDavid</full></name>
+        <player_points><coverage_type>season</coverage_type><total>412.5</total></player_points>
+      </player>
+    </players>
+    <teams count="2">
+      <team><team_key>427.l.97108.t.1</team_key></team>
+      <team><team_key>427.l.97108.t.2</team_key></team>
+    </teams>
+    <team_stats_collection>
+      <coverage>date</coverage>
+      <team_points><date>2023-10-10</date><total>10.5</total></team_points>
+      <team_points><date>2023-10-11</date><total>0</total></team_points>
+    </team_stats_collection>
+    <logo_url></logo_url>
+  </league>
+</fantasy_content>
+"""
+
+EXPECTED = {
+    "league": {
+        "league_key": "427.l.97108",
+        "name": "Men2",
+        "players": [
+            {
+                "player_key": "427.p.6743",
+                "name": {"full": "Connor McDavid"},
+                "player_points": [{"coverage_type": "season", "total": "412.5"}],
+            }
+        ],
+        "teams": [
+            {"team_key": "427.l.97108.t.1"},
+            {"team_key": "427.l.97108.t.2"},
+        ],
+        "team_stats_collection": {
+            "coverage": "date",
+            "team_points": [
+                {"date": "2023-10-10", "total": "10.5"},
+                {"date": "2023-10-11", "total": "0"},
+            ],
+        },
+        "logo_url": "",
+    }
+}
+
+
+class TestXmlDecoder(unittest.TestCase):
+    def test_xml_to_dict(self):
+        self.assertEqual(xml_to_dict(XML), EXPECTED)
+
+    def test_chunked_feed(self):
+        decoder = XmlDecoder()
+        body = XML.encode()
+        for i in range(0, len(body), 16):
+            decoder.feed(body[i : i + 16])
+        self.assertEqual(decoder.close(), EXPECTED)
+
+
+class TestWriteJsonFile(unittest.TestCase):
+    def test_concurrent_writes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache", "players.json")
+            with ThreadPoolExecutor(8) as pool:
+                list(pool.map(lambda i: write_json_file(path, [i] * 1000), range(32)))
+
+            # One writer's data wins whole and no temp files are left behind
+            self.assertEqual(len(set(read_json_file(path))), 1)
+            self.assertEqual(os.listdir(os.path.dirname(path)), ["players.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
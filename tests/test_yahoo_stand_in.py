@@ -0,0 +1,36 @@
+import unittest
+import aiohttp
+from utils import xml_to_dict
+from test_mock_responses import mock_responses, league_key
+from yahoo_stand_in import YahooStandIn
+
+
+class TestYahooStandIn(unittest.IsolatedAsyncioTestCase):
+    async def get(self, stand_in, path):
+        runner, _, base_url = await stand_in.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(base_url + path) as response:
+                    return response.status, await response.text()
+        finally:
+            await runner.cleanup()
+
+    async def test_serves_mock_responses_as_xml(self):
+        path = f"/league/{league_key}/transactions"
+        status, body = await self.get(YahooStandIn(), path)
+        self.assertEqual(status, 200)
+        self.assertEqual(xml_to_dict(body), mock_responses[path])
+
+    async def test_unknown_path(self):
+        status, _ = await self.get(YahooStandIn(), f"/league/{league_key}/nothing")
+        self.assertEqual(status, 404)
+
+    async def test_rate_limit(self):
+        stand_in = YahooStandIn(rate_limit=1.0, rate_limit_status=429)
+        status, _ = await self.get(stand_in, f"/league/{league_key}/transactions")
+        self.assertEqual(status, 429)
+        self.assertEqual(stand_in.num_rate_limited, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
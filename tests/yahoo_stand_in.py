@@ -0,0 +1,249 @@
+"""
+Local stand-in for the Yahoo Fantasy Sports API and its OAuth token endpoint, for running and benchmarking the
+backend offline without burning Yahoo quota.
+
+Serves the captured payloads in test_mock_responses.py by default, or any league that can resolve a request path
+to a response dict (e.g. synthetic_league.SyntheticLeague). Responses are rendered back to Yahoo's XML.
+
+    python tests/yahoo_stand_in.py --port 8081 --latency 0.15 --jitter 0.05 --rate-limit 0.01
+    YAHOO_BASE_URL=http://127.0.0.1:8081/fantasy/v2 YAHOO_LOGIN_URL=http://127.0.0.1:8081 fastapi dev app/main.py
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+API_PREFIX = "/fantasy/v2"
+NAMESPACE = "http://fantasysports.yahooapis.com/fantasy/v2/base.rng"
+REPEATED_TAGS = {"player_points", "player_stats", "team_points"}  # Repeated in place
+CHILD_TAGS = {"draft_results": "draft_result", "stats": "stat"}  # Irregular plurals
+RATE_LIMIT_BODY = "Request denied"  # What Yahoo sends along with a 999
+
+
+def render(tag, value, out):
+    if isinstance(value, dict):
+        out.append(f"<{tag}>")
+        for child_tag, child in value.items():
+            if isinstance(child, list) and child_tag in REPEATED_TAGS:
+                for item in child:
+                    render(child_tag, item, out)
+            else:
+                render(child_tag, child, out)
+        out.append(f"</{tag}>")
+    elif isinstance(value, list):
+        child_tag = CHILD_TAGS.get(tag, tag[:-1])
+        out.append(f'<{tag} count="{len(value)}">')
+        for item in value:
+            render(child_tag, item, out)
+        out.append(f"</{tag}>")
+    else:
+        out.append(f"<{tag}>{escape(str(value))}</{tag}>")
+
+
+def dict_to_xml(data):
+    """
+    Inverse of utils.xml_to_dict for the shapes Yahoo responses use
+    Returns:
+        str
+    """
+    out = [
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<fantasy_content xmlns="{NAMESPACE}">'
+    ]
+    for tag, value in data.items():
+        render(tag, value, out)
+    out.append("</fantasy_content>")
+    return "".join(out)
+
+
+class YahooStandIn:
+    def __init__(
+        self,
+        resolve=None,
+        latency=0.0,
+        jitter=0.0,
+        rate_limit=0.0,
+        max_requests_per_second=None,
+        rate_limit_status=999,
+        check_tokens=False,
+        seed=0,
+    ):
+        """
+        resolve(path) returns the response dict for an API path (without API_PREFIX) or None for a 404,
+        defaults to the captured mock responses.
+        Every response is delayed by latency +- jitter seconds. A rate_limit fraction of requests, and any request
+        over max_requests_per_second, gets rate_limit_status (999 like Yahoo, or 429) instead of data.
+        With check_tokens only access tokens issued by the stand-in's token endpoint are accepted, others get a 401.
+        """
+        if resolve is None:
+            from test_mock_responses import mock_responses
+
+            resolve = mock_responses.get
+        self.resolve = resolve
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.max_requests_per_second = max_requests_per_second
+        self.rate_limit_status = rate_limit_status
+        self.check_tokens = check_tokens
+        self.issued_tokens = set()
+        self.rng = random.Random(seed)
+        self.xml_cache = {}  # {[path: str]: bytes}
+        self.request_times = deque()  # Arrival times within the last second
+        self.num_requests = 0
+        self.num_rate_limited = 0
+        self.num_unauthorized = 0
+        self.num_token_refreshes = 0
+
+    def reset_counts(self):
+        self.num_requests = 0
+        self.num_rate_limited = 0
+        self.num_unauthorized = 0
+        self.num_token_refreshes = 0
+
+    def is_rate_limited(self):
+        now = time.monotonic()
+        self.request_times.append(now)
+        while self.request_times[0] <= now - 1:
+            self.request_times.popleft()
+        if self.max_requests_per_second is not None:
+            if len(self.request_times) > self.max_requests_per_second:
+                return True
+        return self.rng.random() < self.rate_limit
+
+    async def delay(self):
+        seconds = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def get_xml(self, path):
+        if path not in self.xml_cache:
+            data = self.resolve(path)
+            self.xml_cache[path] = None if data is None else dict_to_xml(data).encode()
+        return self.xml_cache[path]
+
+    async def handle_api(self, request):
+        self.num_requests += 1
+        rate_limited = self.is_rate_limited()
+        await self.delay()
+        if self.check_tokens:
+            access_token = request.headers.get("Authorization", "").removeprefix(
+                "Bearer "
+            )
+            if access_token not in self.issued_tokens:
+                self.num_unauthorized += 1
+                return web.Response(status=401, text="token_expired")
+        if rate_limited:
+            self.num_rate_limited += 1
+            return web.Response(status=self.rate_limit_status, text=RATE_LIMIT_BODY)
+        body = self.get_xml("/" + request.match_info["path"])
+        if body is None:
+            return web.Response(status=404, text=f"No response for {request.path}")
+        return web.Response(body=body, content_type="application/xml")
+
+    async def handle_token(self, request):
+        self.num_token_refreshes += 1
+        await self.delay()
+        form = await request.post()
+        access_token = f"stand-in-{self.num_token_refreshes}"
+        self.issued_tokens.add(access_token)
+        return web.json_response(
+            {
+                "access_token": access_token,
+                "refresh_token": form.get("refresh_token", "stand-in"),
+                "token_type": "bearer",
+                "expires_in": 3600,
+            }
+        )
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get(API_PREFIX + "/{path:.*}", self.handle_api)
+        app.router.add_post("/oauth2/get_token", self.handle_token)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        Starts serving in the running event loop
+        Returns:
+            (runner: web.AppRunner, login_url: str, base_url: str) clean up with await runner.cleanup()
+        """
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        login_url = f"http://{host}:{port}"
+        return runner, login_url, login_url + API_PREFIX
+
+    def start_in_thread(self, host="127.0.0.1", port=0):
+        """
+        Starts serving from a daemon thread with its own event loop, so the stand-in outlives the caller's event loops
+        (every asyncio.run is a new one) and busy client code can't delay its responses. TokenManager's refreshes
+        reach it from their asyncio.to_thread worker like any other request
+        Returns:
+            (stop: callable, login_url: str, base_url: str)
+        """
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        runner, login_url, base_url = asyncio.run_coroutine_threadsafe(
+            self.start(host, port), loop
+        ).result()
+
+        def stop():
+            asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+        return stop, login_url, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument(
+        "--rate-limit", type=float, default=0.0, help="fraction of requests denied"
+    )
+    parser.add_argument("--max-rps", type=int, default=None)
+    parser.add_argument("--rate-limit-status", type=int, default=999)
+    parser.add_argument(
+        "--check-tokens",
+        action="store_true",
+        help="reject access tokens the stand-in didn't issue",
+    )
+    parser.add_argument(
+        "--synthetic-teams",
+        type=int,
+        default=None,
+        help="serve a SyntheticLeague of this size instead of the captured responses",
+    )
+    args = parser.parse_args()
+
+    resolve = None
+    if args.synthetic_teams:
+        from synthetic_league import SyntheticLeague
+
+        league = SyntheticLeague(num_teams=args.synthetic_teams)
+        resolve = league.resolve
+        print(f"Serving synthetic league {league.league_key}")
+    stand_in = YahooStandIn(
+        resolve=resolve,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        max_requests_per_second=args.max_rps,
+        rate_limit_status=args.rate_limit_status,
+        check_tokens=args.check_tokens,
+    )
+    web.run_app(stand_in.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()